@@ -1,3 +1,5 @@
 from .user import router as user_router
 from .passa import router as pa_router
-__all__ = ("user_router", "pa_router")
+from .metrics import router as metrics_router
+from .debug import router as debug_router
+__all__ = ("user_router", "pa_router", "metrics_router", "debug_router")
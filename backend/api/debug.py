@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from backend.dependices import get_current_user
+from backend.loopmonitor import loop_monitor
+from backend.models import User
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/loop/")
+async def get_loop_stats(user: User = Depends(get_current_user)):
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return {"stats": loop_monitor.stats(), "blocks": list(loop_monitor.reports)}
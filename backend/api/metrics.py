@@ -0,0 +1,53 @@
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from backend.cache import auth_cache
+from backend.db import get_session
+from backend.dependices import get_current_user
+from backend.hashing import hash_pool
+from backend.metrics import METRICS_TOKEN, registry
+from backend.throttle import login_throttle
+
+router = APIRouter(tags=["metrics"])
+
+
+def collect_component_stats():
+    for prefix, stats in (
+        ("auth_cache", auth_cache.stats()),
+        ("password_hash_pool", hash_pool.stats()),
+        ("login_throttle", login_throttle.stats()),
+    ):
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}_{key}", f"{prefix} {key}", value
+
+
+registry.add_collector(collect_component_stats)
+
+
+async def require_metrics_access(
+    authorization: str | None = Header(None), session: AsyncSession = Depends(get_session)
+):
+    # Метрики раскрывают маршруты и нагрузку: нужен METRICS_TOKEN
+    # или токен администратора
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if METRICS_TOKEN and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    user = await get_current_user(token, session)
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
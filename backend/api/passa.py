@@ -1,18 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+import os
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.db import get_session
-from backend.repositories import PasswordRepository
+from backend.breach import breach_corpus
+from backend.db import get_session, new_session
+from backend.importers import get_record_iterator
+from backend.pagination import (
+    decode_change_cursor,
+    decode_cursor,
+    encode_change_cursor,
+    encode_cursor,
+)
+from backend.repositories import PasswordRepository, VaultStatsRepository
+from backend.repositories.stats import CHANGED, CREATED, month_key
 from backend.schemas import (
     PasswordEntryCreate,
+    PasswordEntryPage,
     PasswordEntryResponse,
     PasswordEntryWithPasswordResponse,
 )
 from backend.dependices import get_current_user
 from backend.models import User
-from backend.schemas.passa import PasswordEntryUpdate
+from backend.schemas.passa import (
+    PasswordBatchRequest,
+    PasswordBatchResponse,
+    PasswordBreachReport,
+    PasswordEntryChanges,
+    PasswordEntryUpdate,
+    PasswordImportReport,
+    PasswordReuseReport,
+    VaultStatsResponse,
+)
 
 router = APIRouter(prefix="/passwords", tags=["passwords"])
 
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+STALE_PASSWORD_DAYS = int(os.getenv("STALE_PASSWORD_DAYS", "180"))
+
+
+def vault_etag(version: int, *parts) -> str:
+    return 'W/"' + "-".join(map(str, (version, *parts))) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+def entry_rows_to_json(rows) -> list[dict]:
+    # Строки из PasswordRepository.LIST_COLUMNS сериализуются без Pydantic
+    return [
+        {
+            "id_entry": id_entry,
+            "website": website,
+            "username": username,
+            "notes": notes,
+            "created_at": created_at.isoformat(),
+        }
+        for id_entry, website, username, notes, created_at in rows
+    ]
+
 
 @router.post("/", response_model=PasswordEntryResponse)
 async def create_password_entry(
@@ -26,26 +91,317 @@ async def create_password_entry(
     return entry
 
 
-@router.get("/", response_model=list[PasswordEntryResponse])
+async def _import_chunk(
+        session: AsyncSession,
+        id_user: int,
+        entries: list[PasswordEntryCreate],
+        rows: list[int],
+        errors: list[dict],
+) -> int:
+    try:
+        return await PasswordRepository.import_entries(session, id_user, entries)
+    except SQLAlchemyError as e:
+        await session.rollback()
+        errors.extend({"row": row, "error": f"Database error: {e.__class__.__name__}"} for row in rows)
+        return 0
+
+
+@router.post("/import/", response_model=PasswordImportReport)
+async def import_password_entries(
+        request: Request,
+        session: AsyncSession = Depends(get_session),
+        user: User = Depends(get_current_user),
+):
+    iter_records = get_record_iterator(request.headers.get("content-type", ""))
+    if iter_records is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected text/csv or application/x-ndjson body"
+        )
+
+    imported = 0
+    errors = []
+    entries, rows = [], []
+    try:
+        async for row, record, error in iter_records(request.stream()):
+            if error is None:
+                try:
+                    entries.append(PasswordEntryCreate(**record))
+                    rows.append(row)
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                    )
+            if error is not None:
+                errors.append({"row": row, "error": error})
+
+            if len(entries) >= IMPORT_CHUNK_SIZE:
+                imported += await _import_chunk(session, user.id_user, entries, rows, errors)
+                entries, rows = [], []
+
+        if entries:
+            imported += await _import_chunk(session, user.id_user, entries, rows, errors)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be UTF-8 encoded"
+        )
+
+    errors.sort(key=lambda item: item["row"])
+    return {"imported": imported, "failed": len(errors), "errors": errors}
+
+
+def _export_record(row, password: str | None) -> dict:
+    if password is None:
+        # Запись, которую нельзя расшифровать (ее ключ убран из VAULT_KEYS),
+        # попадает в выгрузку явной ошибкой: статус 200 уже отправлен, и
+        # молча обрезанная копия выглядела бы полной
+        return {"id_entry": row.id_entry, "website": row.website, "error": "undecryptable"}
+    return {
+        "website": row.website,
+        "username": row.username,
+        "password": password,
+        "notes": row.notes,
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+async def _export_ndjson(id_user: int):
+    # Отдельная сессия: сессия из get_session закрывается до начала стриминга
+    async with new_session() as session:
+        async for rows in PasswordRepository.stream_user_entries(
+            session, id_user, EXPORT_BATCH_SIZE
+        ):
+            passwords = await PasswordRepository.try_decrypt_passwords(
+                [row.encrypted_password for row in rows]
+            )
+            yield "".join(
+                json.dumps(_export_record(row, password), ensure_ascii=False) + "\n"
+                for row, password in zip(rows, passwords)
+            )
+
+
+@router.get("/export/")
+async def export_password_entries(user: User = Depends(get_current_user)):
+    return StreamingResponse(
+        _export_ndjson(user.id_user),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="vault.ndjson"'},
+    )
+
+
+@router.get("/search/", response_model=list[PasswordEntryResponse])
+async def search_password_entries(
+        q: str = Query(..., min_length=1, max_length=255),
+        limit: int = Query(20, ge=1, le=100),
+        session: AsyncSession = Depends(get_session),
+        user: User = Depends(get_current_user),
+):
+    rows = await PasswordRepository.search_entries(session, user.id_user, q, limit)
+    return JSONResponse(entry_rows_to_json(rows))
+
+
+@router.get("/health/reused/", response_model=PasswordReuseReport)
+async def get_reused_passwords(
+        session: AsyncSession = Depends(get_session),
+        user: User = Depends(get_current_user),
+):
+    rows = await PasswordRepository.get_reused_entries(session, user.id_user)
+    groups = [
+        {"entries": entry_rows_to_json(row[:-1] for row in group)}
+        for _, group in groupby(rows, key=lambda row: row.password_fingerprint)
+    ]
+    return JSONResponse({"reused_entries": len(rows), "groups": groups})
+
+
+@router.get("/health/breached/", response_model=PasswordBreachReport)
+async def get_breached_passwords(
+        session: AsyncSession = Depends(get_session),
+        user: User = Depends(get_current_user),
+):
+    if breach_corpus is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Breach corpus is not configured"
+        )
+    rows = await PasswordRepository.get_breached_entries(session, user.id_user)
+    return JSONResponse({"breached_entries": len(rows), "entries": entry_rows_to_json(rows)})
+
+
+@router.get("/stats/", response_model=VaultStatsResponse)
+async def get_vault_stats(
+        session: AsyncSession = Depends(get_session),
+        user: User = Depends(get_current_user),
+):
+    stats, buckets = await VaultStatsRepository.get(session, user.id_user)
+    if stats is None:
+        # Пользователь, чьи записи появились до агрегатов: один полный пересчет
+        await VaultStatsRepository.rebuild(session, [user.id_user])
+        await session.commit()
+        stats, buckets = await VaultStatsRepository.get(session, user.id_user)
+
+    # Точность — месяц: запись устарела, если пароль менялся в месяце раньше граничного
+    threshold = month_key(datetime.utcnow() - timedelta(days=STALE_PASSWORD_DAYS))
+    return {
+        "entries": stats.entries,
+        "weak": stats.weak,
+        "reused": stats.reused,
+        "breached": stats.breached,
+        "stale": sum(row.entries for row in buckets if row.kind == CHANGED and row.month < threshold),
+        "stale_after_days": STALE_PASSWORD_DAYS,
+        "age": [
+            {"month": row.month, "entries": row.entries} for row in buckets if row.kind == CREATED
+        ],
+    }
+
+
+@router.post("/batch/", response_model=PasswordBatchResponse)
+async def batch_password_entries(
+        batch: PasswordBatchRequest,
+        session: AsyncSession = Depends(get_session),
+        user: User = Depends(get_current_user),
+):
+    if len(batch.get) + len(batch.update) + len(batch.delete) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BATCH_MAX_ITEMS} items per batch"
+        )
+
+    try:
+        applied = await PasswordRepository.apply_batch(
+            session,
+            user.id_user,
+            batch.get,
+            [item.dict(exclude_unset=True) for item in batch.update],
+            batch.delete,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    results = []
+    for item in batch.update:
+        ok = item.id_entry in applied["update"]
+        results.append({"id_entry": item.id_entry, "action": "update", "status": "ok" if ok else "not_found"})
+    for entry_id in batch.get:
+        found = applied["get"].get(entry_id)
+        result = {"id_entry": entry_id, "action": "get", "status": "ok" if found else "not_found"}
+        if found:
+            row, password = found
+            result["entry"] = {**entry_rows_to_json([row[:5]])[0], "password": password}
+        results.append(result)
+    for entry_id in batch.delete:
+        ok = entry_id in applied["delete"]
+        results.append({"id_entry": entry_id, "action": "delete", "status": "ok" if ok else "not_found"})
+    return JSONResponse({"results": results})
+
+
+@router.get("/changes/", response_model=PasswordEntryChanges)
+async def get_password_changes(
+        since: int = Query(0, ge=0),
+        cursor: Optional[str] = None,
+        limit: int = Query(500, ge=1, le=5000),
+        session: AsyncSession = Depends(get_session),
+        user: User = Depends(get_current_user),
+):
+    try:
+        after = decode_change_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    version = await PasswordRepository.get_vault_version(session, user.id_user)
+    if since > version:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown vault version"
+        )
+    if 0 < since < await PasswordRepository.get_purged_version(session, user.id_user):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Changes are no longer available, full resync required"
+        )
+
+    rows = await PasswordRepository.get_changes(
+        session, user.id_user, since, limit + 1, after
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_change_cursor(rows[-1].row_version, rows[-1].id_entry)
+    return JSONResponse({
+        "version": version,
+        "upserts": entry_rows_to_json(row[:5] for row in rows if row.deleted_at is None),
+        "deleted": [row.id_entry for row in rows if row.deleted_at is not None],
+        "cursor": next_cursor,
+    })
+
+
+@router.get("/", response_model=PasswordEntryPage)
 async def get_password_entries(
+        request: Request,
+        limit: int = Query(50, ge=1, le=500),
+        cursor: Optional[str] = None,
         session: AsyncSession = Depends(get_session),
         user: User = Depends(get_current_user),
 ):
-    entries = await PasswordRepository.get_user_entries(session, user.id_user)
-    return entries
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    # Версия хранилища меняется при любой записи, так что ETag можно
+    # проверить до чтения самих записей
+    version = await PasswordRepository.get_vault_version(session, user.id_user)
+    etag = vault_etag(version, limit, cursor or "")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    rows = await PasswordRepository.get_user_entries(
+        session, user.id_user, limit + 1, after
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id_entry)
+    return JSONResponse(
+        {"items": entry_rows_to_json(rows), "next_cursor": next_cursor},
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
 
 
 @router.get("/{entry_id}/", response_model=PasswordEntryWithPasswordResponse)
 async def get_password_entry(
         entry_id: int,
+        request: Request,
+        response: Response,
         session: AsyncSession = Depends(get_session),
         user: User = Depends(get_current_user),
 ):
+    # 304 только для существующей записи этого пользователя: иначе ответ на
+    # чужой или удаленный id (в том числе с If-None-Match: *) отличался бы от 404
     entry = await PasswordRepository.get_entry_by_id(session, entry_id, user.id_user)
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
 
+    version = await PasswordRepository.get_vault_version(session, user.id_user)
+    etag = vault_etag(version, "entry", entry_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     decrypted_password = await PasswordRepository.decrypt_entry_password(entry)
+    await PasswordRepository.upgrade_ciphertexts(
+        session, [(entry.id_entry, entry.encrypted_password, decrypted_password)]
+    )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return {
         **PasswordEntryResponse.from_orm(entry).dict(),
         "password": decrypted_password,
@@ -1,17 +1,20 @@
 # backend/api/auth.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from backend.cache import auth_cache, token_digest
+from backend.hashing import hash_pool
 from backend.models import User
+from backend.revocation import revocation_filter
+from backend.throttle import login_throttle
 from backend.repositories import UserRepository, RevokedTokenRepository
 from backend.db import get_session
 from backend.schemas import UserCreate, UserLogin, Token, UserResponse, UserProfile
 from backend.security import (
-    hash_password,
-    verify_password,
     create_access_token,
     oauth2_scheme,
     decode_token,
+    token_id,
 )
 from backend.dependices import get_current_user
 
@@ -31,11 +34,33 @@ async def register(user_data: UserCreate, session: AsyncSession = Depends(get_se
 
 
 @router.post("/login/", response_model=Token)
-async def login(user_data: UserLogin, session: AsyncSession = Depends(get_session)):
-    user = await UserRepository.get_user_by_email(session, user_data.email)
-    if not user or not verify_password(user_data.password, user.password_hash):
+async def login(
+    user_data: UserLogin, request: Request, session: AsyncSession = Depends(get_session)
+):
+    client_ip = request.client.host if request.client else None
+    # Попытка резервируется до запроса в БД и bcrypt и остается неудачной,
+    # если вход не состоится
+    await login_throttle.check(user_data.email, client_ip)
+
+    try:
+        user = await UserRepository.get_user_by_email(session, user_data.email)
+        valid = user is not None and await hash_pool.verify(
+            user_data.password, user.password_hash
+        )
+    except Exception:
+        # Пароль не проверен (503 от пула хеширования, ошибка БД): попытка
+        # не засчитывается
+        await login_throttle.release(user_data.email, client_ip)
+        raise
+    if user is None:
+        # Для несуществующего email блокировка ничего не защищает, а попытка
+        # по-прежнему считается в лимите IP
+        await login_throttle.release(user_data.email, client_ip, keep_ip=True)
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
+    await login_throttle.record_success(user_data.email, client_ip)
+
     token = create_access_token({"sub": user.email})
     return {"access_token": token, "token_type": "bearer"}
 
@@ -49,6 +74,17 @@ async def get_users(
     return await UserRepository.get_all_users(session)
 
 
+@router.get("/stats/")
+async def get_auth_stats(user: User = Depends(get_current_user)):
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return {
+        "auth_cache": auth_cache.stats(),
+        "hash_pool": hash_pool.stats(),
+        "login_throttle": login_throttle.stats(),
+    }
+
+
 @router.get("/profile/", response_model=UserProfile)
 async def get_profile(user: User = Depends(get_current_user)):
     return UserProfile(email=user.email, is_admin=user.is_admin)
@@ -61,7 +97,11 @@ async def logout(
     user: User = Depends(get_current_user),
 ):
     payload = await decode_token(token)
-    expires_at = datetime.fromtimestamp(payload.get("exp"))
-    await RevokedTokenRepository.revoke_token(session, token, expires_at)
+    expires_at = datetime.utcfromtimestamp(payload.get("exp"))
+    jti = token_id(token, payload)
+    await RevokedTokenRepository.revoke_token(session, jti, expires_at)
+    if revocation_filter:
+        revocation_filter.add(jti, payload.get("exp"))
+    auth_cache.invalidate_token(token_digest(token))
     return {"message": "Successfully logged out"}
 
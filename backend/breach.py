@@ -0,0 +1,159 @@
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+BREACH_CORPUS_PATH = os.getenv("BREACH_CORPUS_PATH", "")
+
+MAGIC = b"HIBP"
+LAYOUT_VERSION = 1
+# magic, layout, число хэшей
+HEADER = struct.Struct("<4sIQ")
+# Индекс по первым двум байтам: позиция первой записи с таким префиксом,
+# последний элемент — общее число записей
+INDEX = struct.Struct("<65537Q")
+INDEX_OFFSET = HEADER.size
+RECORDS_OFFSET = INDEX_OFFSET + INDEX.size
+RECORD_SIZE = 20
+# SHA-1 как три числа: сравнение без копирования среза из mmap
+RECORD_KEY = struct.Struct(">QQI")
+SORT_CHUNK_RECORDS = int(os.getenv("BREACH_SORT_CHUNK_RECORDS", "10000000"))
+
+
+def password_sha1(password: str) -> bytes:
+    return hashlib.sha1(password.encode()).digest()
+
+
+def _parse_digest(line: bytes, line_number: int) -> bytes:
+    # Строка HIBP: "<40 hex SHA-1>:<count>"; счетчик не нужен
+    value = line.split(b":", 1)[0].strip()
+    if len(value) != 2 * RECORD_SIZE:
+        raise ValueError(f"Line {line_number}: expected a SHA-1 hex digest")
+    try:
+        return bytes.fromhex(value.decode("ascii"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Line {line_number}: expected a SHA-1 hex digest") from e
+
+
+def _sorted_runs(source: str, tmp: str, chunk_records: int) -> list[str]:
+    runs = []
+    chunk = []
+
+    def flush():
+        chunk.sort()
+        path = os.path.join(tmp, f"run-{len(runs)}")
+        with open(path, "wb") as f:
+            f.write(b"".join(chunk))
+        runs.append(path)
+        chunk.clear()
+
+    with open(source, "rb") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                chunk.append(_parse_digest(line, line_number))
+                if len(chunk) >= chunk_records:
+                    flush()
+    if chunk:
+        flush()
+    return runs
+
+
+def _read_run(path: str):
+    with open(path, "rb") as f:
+        while record := f.read(RECORD_SIZE):
+            yield record
+
+
+def build_corpus(source: str, output: str, chunk_records: int = SORT_CHUNK_RECORDS) -> int:
+    """Переводит список SHA-1 в формате HIBP в отсортированный бинарный файл.
+
+    Исходник может быть не отсортирован: части по chunk_records хэшей
+    сортируются в памяти и сливаются с диска, так что память не зависит от
+    размера корпуса. Повторы отбрасываются. Возвращает число хэшей.
+    """
+    directory = os.path.dirname(os.path.abspath(output))
+    index = [0] * 65537
+    count = 0
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        runs = _sorted_runs(source, tmp, chunk_records)
+        partial = output + ".tmp"
+        with open(partial, "wb") as f:
+            f.seek(RECORDS_OFFSET)
+            previous = None
+            for record in heapq.merge(*(_read_run(path) for path in runs)):
+                if record == previous:
+                    continue
+                f.write(record)
+                index[(record[0] << 8 | record[1]) + 1] += 1
+                previous = record
+                count += 1
+            for prefix in range(1, 65537):
+                index[prefix] += index[prefix - 1]
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, LAYOUT_VERSION, count))
+            f.write(INDEX.pack(*index))
+        os.replace(partial, output)
+    return count
+
+
+class BreachCorpus:
+    """Отсортированный корпус SHA-1 в mmap.
+
+    Поиск — двоичный поиск внутри диапазона из индекса префиксов, около
+    log2(n / 65536) чтений страниц; резидентны только прочитанные страницы.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < RECORDS_OFFSET:
+            raise ValueError(f"{path} is not a breach corpus")
+        magic, layout, self.count = HEADER.unpack_from(self._mm, 0)
+        if (magic, layout) != (MAGIC, LAYOUT_VERSION):
+            raise ValueError(f"{path} is not a breach corpus")
+        if len(self._mm) != RECORDS_OFFSET + self.count * RECORD_SIZE:
+            raise ValueError(f"{path} is truncated")
+        if hasattr(mmap, "MADV_RANDOM"):
+            self._mm.madvise(mmap.MADV_RANDOM)
+
+    def contains_digest(self, digest: bytes) -> bool:
+        prefix = digest[0] << 8 | digest[1]
+        low, high = struct.unpack_from("<QQ", self._mm, INDEX_OFFSET + prefix * 8)
+        key = RECORD_KEY.unpack(digest)
+        while low < high:
+            middle = (low + high) // 2
+            value = RECORD_KEY.unpack_from(self._mm, RECORDS_OFFSET + middle * RECORD_SIZE)
+            if value < key:
+                low = middle + 1
+            elif value > key:
+                high = middle
+            else:
+                return True
+        return False
+
+    def contains(self, password: str) -> bool:
+        return self.contains_digest(password_sha1(password))
+
+    def close(self):
+        self._mm.close()
+
+
+def open_breach_corpus() -> BreachCorpus | None:
+    if not BREACH_CORPUS_PATH:
+        return None
+    try:
+        corpus = BreachCorpus(BREACH_CORPUS_PATH)
+    except (OSError, ValueError):
+        logger.exception("Breach corpus is unavailable, breach checks are disabled")
+        return None
+    logger.info("Loaded breach corpus with %d hashes", corpus.count)
+    return corpus
+
+
+breach_corpus = open_breach_corpus()
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+
+from backend.models import User
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class CachedPrincipal(NamedTuple):
+    user: User
+    jti: str
+    # Поколение общего фильтра отзывов, при котором токен последний раз проверялся
+    generation: int
+    expires_at: float
+
+
+class AuthCache:
+    def __init__(self, max_size: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CachedPrincipal] = OrderedDict()
+        self._by_email: dict[str, set[str]] = {}
+        self._lock = Lock()
+
+    def get(self, digest: str) -> CachedPrincipal | None:
+        with self._lock:
+            item = self._entries.get(digest)
+            if item is None:
+                self.misses += 1
+                return None
+            if item.expires_at <= time.time():
+                self._remove(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return item
+
+    def set(
+        self,
+        digest: str,
+        user: User,
+        token_exp: float | None = None,
+        jti: str = "",
+        generation: int = 0,
+    ):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._remove(digest)
+            self._entries[digest] = CachedPrincipal(user, jti, generation, expires_at)
+            self._by_email.setdefault(user.email, set()).add(digest)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def mark_checked(self, digest: str, generation: int):
+        with self._lock:
+            item = self._entries.get(digest)
+            if item is not None:
+                self._entries[digest] = item._replace(generation=generation)
+
+    def invalidate_token(self, digest: str):
+        with self._lock:
+            self._remove(digest)
+
+    def invalidate_user(self, email: str):
+        with self._lock:
+            for digest in list(self._by_email.get(email, ())):
+                self._remove(digest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_email.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    def _remove(self, digest: str):
+        item = self._entries.pop(digest, None)
+        if item is None:
+            return
+        digests = self._by_email.get(item.user.email)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_email[item.user.email]
+
+
+auth_cache = AuthCache()
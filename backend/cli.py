@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import logging
+
+from backend.breach import SORT_CHUNK_RECORDS, build_corpus
+from backend.db import engine, new_session
+from backend.repositories import VaultStatsRepository
+from backend.rotation import (
+    KEY_ROTATION_BATCH_SIZE,
+    KEY_ROTATION_ROWS_PER_SECOND,
+    run_key_rotation,
+)
+from backend.tasks import (
+    BREACH_CHECK_BATCH,
+    FINGERPRINT_BACKFILL_BATCH,
+    backfill_fingerprints,
+    recheck_breaches,
+)
+
+
+async def rotate_keys(args):
+    from backend.main import init_db
+
+    await init_db()
+    rotated = await run_key_rotation(args.batch_size, args.rows_per_second)
+    print(f"Rewritten {rotated} entries")
+
+
+async def backfill_fingerprints_command(args):
+    from backend.main import init_db
+
+    await init_db()
+    updated = await backfill_fingerprints(args.batch_size, args.recompute)
+    print(f"Fingerprinted {updated} entries")
+
+
+async def build_breach_corpus(args):
+    count = await asyncio.to_thread(build_corpus, args.source, args.output, args.chunk_records)
+    print(f"Wrote {count} hashes to {args.output}")
+
+
+async def recheck_breaches_command(args):
+    from backend.main import init_db
+
+    await init_db()
+    breached = await recheck_breaches(args.batch_size, args.recompute)
+    print(f"Found {breached} breached entries")
+
+
+async def rebuild_stats(args):
+    from backend.main import init_db
+
+    await init_db()
+    async with new_session() as session:
+        rebuilt = await VaultStatsRepository.rebuild(session, args.user_id)
+        await session.commit()
+    print(f"Rebuilt stats for {rebuilt} users")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rotate = commands.add_parser("rotate-keys", help="Re-encrypt the vault with the current key")
+    rotate.add_argument("--batch-size", type=int, default=KEY_ROTATION_BATCH_SIZE)
+    rotate.add_argument("--rows-per-second", type=float, default=KEY_ROTATION_ROWS_PER_SECOND)
+    rotate.set_defaults(handler=rotate_keys)
+
+    backfill = commands.add_parser(
+        "backfill-fingerprints", help="Compute password fingerprints for existing entries"
+    )
+    backfill.add_argument("--batch-size", type=int, default=FINGERPRINT_BACKFILL_BATCH)
+    backfill.add_argument(
+        "--recompute", action="store_true", help="recompute all fingerprints after a key change"
+    )
+    backfill.set_defaults(handler=backfill_fingerprints_command)
+
+    corpus = commands.add_parser(
+        "build-breach-corpus", help="Convert a HIBP SHA-1 list into a sorted binary corpus"
+    )
+    corpus.add_argument("source", help="text file with SHA1[:count] lines")
+    corpus.add_argument("output", help="path for BREACH_CORPUS_PATH")
+    corpus.add_argument("--chunk-records", type=int, default=SORT_CHUNK_RECORDS)
+    corpus.set_defaults(handler=build_breach_corpus)
+
+    recheck = commands.add_parser(
+        "recheck-breaches", help="Check stored passwords against BREACH_CORPUS_PATH"
+    )
+    recheck.add_argument("--batch-size", type=int, default=BREACH_CHECK_BATCH)
+    recheck.add_argument(
+        "--recompute", action="store_true", help="recheck all entries after a corpus update"
+    )
+    recheck.set_defaults(handler=recheck_breaches_command)
+
+    stats = commands.add_parser("rebuild-stats", help="Recompute vault stats from the entries")
+    stats.add_argument(
+        "--user-id", type=int, action="append", help="rebuild only this user (repeatable)"
+    )
+    stats.set_defaults(handler=rebuild_stats)
+    return parser
+
+
+async def run(args):
+    try:
+        await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
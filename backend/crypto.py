@@ -0,0 +1,154 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import struct
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LEGACY_FERNET_KEY = "W9Er9gRuwAQRM4AtdBX5cQ_5Z-3XZ3bwM5SZ3yH0z2Q="
+LEGACY_FERNET_KEYS = os.getenv("LEGACY_FERNET_KEYS", LEGACY_FERNET_KEY)
+
+# Формат v1: версия (1 байт) | id ключа (1 байт) | nonce (12 байт) | шифртекст+тег.
+# Токены Fernet начинаются с b"g" (base64 от 0x80), так что форматы не пересекаются
+ENVELOPE_VERSION = 1
+ENVELOPE_HEADER = struct.Struct(">BB")
+NONCE_SIZE = 12
+FINGERPRINT_SIZE = 16
+
+
+class DecryptionError(ValueError):
+    pass
+
+
+class VaultConfigError(ValueError):
+    # Ошибка в VAULT_KEYS / VAULT_CURRENT_KEY_ID: сообщение не содержит самих ключей
+    pass
+
+
+def derive_key(secret: str, key_id: int) -> bytes:
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=f"gerasin-vault-key-{key_id}".encode(),
+    ).derive(secret.encode())
+
+
+def parse_keys(value: str) -> dict[int, bytes]:
+    # "1:<base64 32 байта>,2:<base64 32 байта>"; id ключа пишется в конверт
+    # одним байтом, поэтому допустимы 0–255
+    keys = {}
+    for position, item in enumerate(filter(None, (part.strip() for part in value.split(","))), 1):
+        key_id, separator, key = item.partition(":")
+        if not separator:
+            raise VaultConfigError(f"VAULT_KEYS entry {position} must look like <id>:<base64 key>")
+        try:
+            key_id = int(key_id)
+        except ValueError:
+            raise VaultConfigError(f"VAULT_KEYS entry {position} has a non-numeric key id") from None
+        if not 0 <= key_id <= 255:
+            raise VaultConfigError(f"Vault key id {key_id} must be between 0 and 255")
+        if key_id in keys:
+            raise VaultConfigError(f"Vault key id {key_id} is listed more than once")
+        try:
+            raw = base64.urlsafe_b64decode(key.strip())
+        except binascii.Error:
+            raise VaultConfigError(f"Vault key {key_id} is not valid base64") from None
+        if len(raw) != 32:
+            raise VaultConfigError(f"Vault key {key_id} must be 32 bytes")
+        keys[key_id] = raw
+    return keys
+
+
+class VaultCipher:
+    def __init__(self, keys: dict[int, bytes], current_key_id: int, legacy: MultiFernet):
+        if current_key_id not in keys:
+            raise VaultConfigError(f"Unknown current vault key id {current_key_id}")
+        self.current_key_id = current_key_id
+        self._keys = {key_id: AESGCM(key) for key_id, key in keys.items()}
+        self._legacy = legacy
+
+    @staticmethod
+    def is_legacy(blob: bytes) -> bool:
+        return blob[:1] != bytes([ENVELOPE_VERSION])
+
+    @staticmethod
+    def key_id(blob: bytes) -> int | None:
+        if VaultCipher.is_legacy(blob):
+            return None
+        return blob[1]
+
+    def needs_upgrade(self, blob: bytes) -> bool:
+        return self.key_id(blob) != self.current_key_id
+
+    def encrypt(self, plaintext: str) -> bytes:
+        header = ENVELOPE_HEADER.pack(ENVELOPE_VERSION, self.current_key_id)
+        nonce = os.urandom(NONCE_SIZE)
+        ciphertext = self._keys[self.current_key_id].encrypt(nonce, plaintext.encode(), header)
+        return header + nonce + ciphertext
+
+    def decrypt(self, blob: bytes) -> str:
+        if self.is_legacy(blob):
+            try:
+                return self._legacy.decrypt(blob).decode()
+            except InvalidToken as e:
+                raise DecryptionError("Invalid legacy token") from e
+
+        header = blob[:ENVELOPE_HEADER.size]
+        key_id = blob[1]
+        aead = self._keys.get(key_id)
+        if aead is None:
+            raise DecryptionError(f"Unknown vault key id {key_id}")
+        nonce_end = ENVELOPE_HEADER.size + NONCE_SIZE
+        try:
+            return aead.decrypt(blob[ENVELOPE_HEADER.size:nonce_end], blob[nonce_end:], header).decode()
+        except InvalidTag as e:
+            raise DecryptionError("Ciphertext authentication failed") from e
+
+
+def cipher_from_env() -> VaultCipher:
+    keys = parse_keys(os.getenv("VAULT_KEYS", ""))
+    if not keys:
+        # Без настроек ключ 1 выводится из прежнего ключа Fernet, чтобы
+        # существующие установки работали без изменения конфигурации
+        keys = {1: derive_key(LEGACY_FERNET_KEY, 1)}
+    try:
+        current_key_id = int(os.getenv("VAULT_CURRENT_KEY_ID", str(max(keys))))
+    except ValueError:
+        raise VaultConfigError("VAULT_CURRENT_KEY_ID must be an integer") from None
+    legacy = MultiFernet([Fernet(key.strip()) for key in LEGACY_FERNET_KEYS.split(",") if key.strip()])
+    return VaultCipher(keys, current_key_id, legacy)
+
+
+vault_cipher = cipher_from_env()
+
+
+def fingerprint_key_from_env() -> bytes:
+    # Ключ отпечатков не меняется при ротации ключей хранилища: иначе все
+    # отпечатки пришлось бы пересчитывать с расшифровкой записей
+    secret = os.getenv("VAULT_FINGERPRINT_SECRET", LEGACY_FERNET_KEY)
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"gerasin-vault-fingerprint",
+    ).derive(secret.encode())
+
+
+FINGERPRINT_KEY = fingerprint_key_from_env()
+
+
+def password_fingerprint(id_user: int, password: str, key: bytes = FINGERPRINT_KEY) -> bytes:
+    # id пользователя входит в HMAC: одинаковые пароли разных пользователей
+    # дают разные отпечатки и не сопоставляются между собой
+    digest = hmac.new(key, f"{id_user}:{password}".encode(), hashlib.sha256).digest()
+    return digest[:FINGERPRINT_SIZE]
@@ -1,15 +1,40 @@
 from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
-from .security import oauth2_scheme, decode_token
+from .security import oauth2_scheme, decode_token, token_id
+from .cache import auth_cache, token_digest
 from .db import get_session
 from .models import User
 from .repositories import UserRepository, RevokedTokenRepository
+from .revocation import revocation_filter
+
+
+def _revoked_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked",
+    )
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)
 ) -> User:
+    digest = token_digest(token)
+    cached = auth_cache.get(digest)
+    generation = revocation_filter.generation if revocation_filter else 0
+    if cached is not None:
+        # Кэш воркера не видит logout в других воркерах: если общий фильтр
+        # менялся, токен перепроверяется по нему
+        if cached.generation == generation:
+            return cached.user
+        revoked = revocation_filter.contains(cached.jti)
+        if revoked:
+            auth_cache.invalidate_token(digest)
+            raise _revoked_error()
+        if revoked is False:
+            auth_cache.mark_checked(digest, generation)
+            return cached.user
+
     payload = await decode_token(token)
     email: str = payload.get("sub")
     if not email:
@@ -18,11 +43,14 @@ async def get_current_user(
             detail="Invalid authentication credentials",
         )
 
-    if await RevokedTokenRepository.is_token_revoked(session, token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked",
-        )
+    jti = token_id(token, payload)
+    # False от общего фильтра окончателен только в пределах одной машины,
+    # см. REVOCATION_FILTER_PATH
+    revoked = revocation_filter.contains(jti) if revocation_filter else None
+    if revoked is None:
+        revoked = await RevokedTokenRepository.is_token_revoked(session, jti)
+    if revoked:
+        raise _revoked_error()
 
     user = await UserRepository.get_user_by_email(session, email)
     if not user:
@@ -30,4 +58,6 @@ async def get_current_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+    session.expunge(user)
+    auth_cache.set(digest, user, payload.get("exp"), jti, generation)
     return user
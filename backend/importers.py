@@ -0,0 +1,76 @@
+import codecs
+import csv
+import json
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def iter_lines(stream):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_ndjson_records(stream):
+    row = 0
+    async for line in iter_lines(stream):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "Expected a JSON object"
+            continue
+        yield row, record, None
+
+
+async def iter_csv_records(stream):
+    header = None
+    pending = []
+    quotes = 0
+    row = 0
+    async for line in iter_lines(stream):
+        pending.append(line)
+        quotes += line.count('"')
+        # Нечетное число кавычек — поле в кавычках продолжается на следующей строке
+        if quotes % 2:
+            continue
+        text = "\n".join(pending)
+        pending, quotes = [], 0
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {key: value or None for key, value in zip(header, values)}, None
+
+    if pending:
+        yield row + 1, None, "Unterminated quoted field"
+
+
+def get_record_iterator(content_type: str):
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in CSV_CONTENT_TYPES:
+        return iter_csv_records
+    if media_type in NDJSON_CONTENT_TYPES:
+        return iter_ndjson_records
+    return None
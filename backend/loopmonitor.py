@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from backend.metrics import Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+# Сторожевой поток со снятием стека включается отдельно: он будит процесс
+# несколько раз в секунду и нужен в основном при отладке
+LOOP_BLOCK_DEBUG = os.getenv("LOOP_BLOCK_DEBUG", "").lower() in ("1", "true", "yes")
+LOOP_BLOCK_REPORTS = int(os.getenv("LOOP_BLOCK_REPORTS", "50"))
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+loop_lag = registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay of a scheduled event loop wakeup", (), LAG_BUCKETS
+))
+
+
+class LoopMonitor:
+    """Замеряет задержку пробуждения цикла событий.
+
+    Сэмплер — задача, которая спит interval и сравнивает фактическое время
+    пробуждения с ожидаемым. В отладочном режиме сторожевой поток следит за
+    отметкой сэмплера: если цикл не отвечает дольше threshold, снимается стек
+    потока цикла, то есть кода, который его держит.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        threshold: float = LOOP_BLOCK_THRESHOLD,
+        debug: bool = LOOP_BLOCK_DEBUG,
+        max_reports: int = LOOP_BLOCK_REPORTS,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.last_lag = 0.0
+        self.blocks = 0
+        self.reports: deque[dict] = deque(maxlen=max_reports)
+        self._heartbeat = time.monotonic()
+        self._pending: dict | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: int | None = None
+
+    def start(self):
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample())
+        if self.debug:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._heartbeat = now
+            self.samples += 1
+            self.last_lag = lag
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            loop_lag.observe(lag)
+
+            pending, self._pending = self._pending, None
+            if pending is not None:
+                # Стек снят во время блокировки, а полная длительность известна
+                # только после того, как цикл снова ожил
+                pending["blocked_for"] = round(lag, 6)
+                logger.warning("Event loop was blocked for %.3fs", lag)
+            elif lag > self.threshold:
+                self.blocks += 1
+                logger.warning("Event loop lag %.3fs exceeds %.3fs", lag, self.threshold)
+
+    def _watch(self):
+        check = max(self.threshold / 2, 0.01)
+        while not self._stopped.wait(check):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled <= self.threshold or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            report = {
+                "detected_at": time.time(),
+                "stalled_for": round(stalled, 6),
+                "blocked_for": None,
+                "stack": stack,
+            }
+            self.blocks += 1
+            self.reports.append(report)
+            self._pending = report
+            logger.warning("Event loop blocked for more than %.3fs at:\n%s", stalled, stack)
+
+    def stats(self) -> dict:
+        samples = self.samples or 1
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "debug": self.debug,
+            "samples": self.samples,
+            "lag_last": self.last_lag,
+            "lag_avg": self.lag_total / samples,
+            "lag_max": self.lag_max,
+            "blocks": self.blocks,
+        }
+
+
+loop_monitor = LoopMonitor()
@@ -2,9 +2,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.db import engine, get_session
 from backend.models import Base
-from backend.api import user_router, pa_router
-from backend.repositories import UserRepository
+from backend.api import user_router, pa_router, metrics_router, debug_router
+from backend.hashing import hash_pool
+from backend.loopmonitor import loop_monitor
+from backend.metrics import METRICS_ENABLED, MetricsMiddleware, instrument_engine
+from backend.migrations import upgrade_schema
+from backend.profiling import PROFILE_ON_DEMAND, PROFILE_SAMPLE_RATE, ProfilerMiddleware
+from backend.repositories import UserRepository, RevokedTokenRepository
+from backend.revocation import revocation_filter
+from backend.search import create_search_index
+from backend.tasks import start_background_tasks, stop_background_tasks
 import os
+from datetime import timezone
 from dotenv import load_dotenv
 import logging
 
@@ -25,10 +34,21 @@ app.add_middleware(
 )
 app.include_router(user_router)
 app.include_router(pa_router)
+app.include_router(debug_router)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    app.include_router(metrics_router)
+
+if PROFILE_SAMPLE_RATE > 0 or PROFILE_ON_DEMAND:
+    app.add_middleware(ProfilerMiddleware)
 
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+        await conn.run_sync(create_search_index)
 
 
 async def create_default_admin():
@@ -50,10 +70,34 @@ async def create_default_admin():
             logger.info("Admin user already exists")
 
 
+async def load_revocation_filter():
+    if not revocation_filter:
+        return
+    async for session in get_session():
+        revoked = await RevokedTokenRepository.get_active(session)
+    # Объединение с тем, что уже есть в файле: другие воркеры могли успеть
+    # добавить отзывы, поэтому содержимое не перезаписывается. Новый файл
+    # начинает отвечать отрицательно только после этой загрузки
+    revocation_filter.load(
+        [(jti, expires_at.replace(tzinfo=timezone.utc).timestamp()) for jti, expires_at in revoked]
+    )
+    logger.info("Loaded %d revoked tokens into the shared filter", len(revoked))
+
+
 @app.on_event("startup")
 async def startup():
     await init_db()
+    await load_revocation_filter()
     await create_default_admin()
+    app.state.background_tasks = start_background_tasks()
+    loop_monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await loop_monitor.stop()
+    await stop_background_tasks(app.state.background_tasks)
+    hash_pool.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+import hashlib
+import logging
+
+from sqlalchemy import Column, Connection, MetaData, Table, inspect, text
+from sqlalchemy.schema import CreateTable
+
+from backend.models import Base, KeyRotationCheckpoint, PasswordEntry, RevokedToken, User
+
+logger = logging.getLogger(__name__)
+
+# Шаги обновления схемы в порядке их появления. create_all создает только
+# отсутствующие таблицы, поэтому колонки и индексы, добавленные в уже
+# существующие таблицы, доводятся здесь. Каждый шаг проверяет текущее
+# состояние БД и идемпотентен, так что отдельная таблица версий не нужна
+STEPS = []
+
+
+def step(func):
+    STEPS.append(func)
+    return func
+
+
+def upgrade_schema(connection: Connection):
+    for func in STEPS:
+        func(connection)
+
+
+def _column_names(connection: Connection, table: str) -> set[str]:
+    return {column["name"] for column in inspect(connection).get_columns(table)}
+
+
+def add_column(connection: Connection, column: Column, backfill: str | None = None) -> bool:
+    """ALTER TABLE ... ADD COLUMN по определению колонки в модели.
+
+    NOT NULL ставится только при server_default: иначе ни SQLite, ни Postgres
+    не добавят колонку в непустую таблицу. backfill — SQL-выражение для
+    заполнения уже существующих строк."""
+    table = column.table.name
+    if column.name in _column_names(connection, table):
+        return False
+    ddl = (
+        f"ALTER TABLE {table} ADD COLUMN {column.name} "
+        f"{column.type.compile(dialect=connection.dialect)}"
+    )
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg} NOT NULL"
+    connection.execute(text(ddl))
+    if backfill:
+        connection.execute(
+            text(f"UPDATE {table} SET {column.name} = {backfill} WHERE {column.name} IS NULL")
+        )
+    logger.info("Added column %s.%s", table, column.name)
+    return True
+
+
+def drop_not_null(connection: Connection, *columns: Column) -> bool:
+    table = columns[0].table.name
+    current = {column["name"]: column for column in inspect(connection).get_columns(table)}
+    names = [column.name for column in columns if not current[column.name]["nullable"]]
+    if not names:
+        return False
+    if connection.dialect.name == "sqlite":
+        _rebuild_sqlite_table(connection, table, nullable=names)
+    else:
+        for name in names:
+            connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {name} DROP NOT NULL"))
+    logger.info("Made %s.%s nullable", table, ", ".join(names))
+    return True
+
+
+def _rebuild_sqlite_table(connection: Connection, table: str, nullable: list[str]):
+    # SQLite не умеет ALTER COLUMN: таблица пересоздается по своему текущему
+    # определению (а не по модели, где могут быть еще не добавленные колонки)
+    # с копированием строк, затем восстанавливаются индексы
+    metadata = MetaData()
+    current = Table(table, metadata, autoload_with=connection)
+    for name in nullable:
+        current.c[name].nullable = True
+    rebuilt = current.to_metadata(metadata, name=f"_upgrade_{table}")
+    connection.execute(CreateTable(rebuilt))
+    names = ", ".join(column.name for column in current.columns)
+    connection.execute(text(f"INSERT INTO {rebuilt.name} ({names}) SELECT {names} FROM {table}"))
+    connection.execute(text(f"DROP TABLE {table}"))
+    connection.execute(text(f"ALTER TABLE {rebuilt.name} RENAME TO {table}"))
+    for index in current.indexes:
+        index.create(connection)
+
+
+def create_index(connection: Connection, name: str):
+    index = next(
+        index for table in Base.metadata.tables.values() for index in table.indexes
+        if index.name == name
+    )
+    index.create(connection, checkfirst=True)
+
+
+@step
+def add_pagination_index(connection: Connection):
+    create_index(connection, "ix_password_entries_user_created")
+
+
+@step
+def relax_optional_fields(connection: Connection):
+    # Импорт допускает записи без логина и заметок
+    entries = PasswordEntry.__table__.c
+    drop_not_null(connection, entries.username, entries.notes)
+
+
+@step
+def add_vault_version(connection: Connection):
+    add_column(connection, User.__table__.c.vault_version)
+
+
+@step
+def add_sync_columns(connection: Connection):
+    # Синхронизация изменений: updated_at, надгробия и версии строк
+    entries = PasswordEntry.__table__.c
+    add_column(connection, entries.updated_at, backfill="created_at")
+    add_column(connection, entries.deleted_at)
+    add_column(connection, entries.row_version)
+    add_column(connection, User.__table__.c.purged_version)
+    create_index(connection, "ix_password_entries_deleted_at")
+    create_index(connection, "ix_password_entries_user_version")
+    # /passwords/changes/ отдает записи с row_version > since, так что записи,
+    # существовавшие до обновления, получают версию 1 (иначе их не вернет даже
+    # полная синхронизация с since=0), а хранилища их владельцев — vault_version 1
+    connection.execute(text("UPDATE password_entries SET row_version = 1 WHERE row_version = 0"))
+    connection.execute(
+        text(
+            "UPDATE users SET vault_version = 1 WHERE vault_version = 0 "
+            "AND id_user IN (SELECT id_user FROM password_entries)"
+        )
+    )
+
+
+@step
+def recreate_revoked_tokens(connection: Connection):
+    # Прежняя таблица хранила токены целиком. Токены без jti приложение
+    # опознает по sha256 (см. security.token_id), поэтому отзывы переносятся
+    # в новую таблицу под этим идентификатором со своим сроком
+    table = RevokedToken.__table__
+    if "jti" in _column_names(connection, table.name):
+        return
+    old = Table(table.name, MetaData(), autoload_with=connection)
+    revoked = {
+        hashlib.sha256(token.encode()).hexdigest()[:32]: expires_at
+        for token, expires_at in connection.execute(old.select().with_only_columns(
+            old.c.token, old.c.expires_at
+        ))
+    }
+    table.drop(connection)
+    table.create(connection)
+    if revoked:
+        connection.execute(
+            table.insert(),
+            [{"jti": jti, "expires_at": expires_at} for jti, expires_at in revoked.items()],
+        )
+    logger.info("Moved %d revoked tokens to the jti layout", len(revoked))
+
+
+@step
+def add_rotation_lease(connection: Connection):
+    checkpoints = KeyRotationCheckpoint.__table__.c
+    add_column(connection, checkpoints.failed)
+    add_column(connection, checkpoints.lease_owner)
+    add_column(connection, checkpoints.lease_until)
+
+
+@step
+def add_password_fingerprint(connection: Connection):
+    # Отпечатки существующих записей заполняет задача backfill_fingerprints
+    add_column(connection, PasswordEntry.__table__.c.password_fingerprint)
+    create_index(connection, "ix_password_entries_user_fingerprint")
+
+
+@step
+def add_breach_flag(connection: Connection):
+    add_column(connection, PasswordEntry.__table__.c.breached)
+
+
+@step
+def add_stats_columns(connection: Connection):
+    # NULL в password_changed_at означает «с момента создания записи»,
+    # weak заполняет backfill_fingerprints
+    entries = PasswordEntry.__table__.c
+    add_column(connection, entries.weak)
+    add_column(connection, entries.password_changed_at)
@@ -1,7 +1,8 @@
 from datetime import datetime
+from typing import Optional
 
 
-from sqlalchemy import String, Boolean, DateTime, ForeignKey, LargeBinary, Text
+from sqlalchemy import String, Boolean, DateTime, ForeignKey, Index, Integer, LargeBinary, Text
 from sqlalchemy.orm import Mapped, mapped_column, declarative_base, relationship
 
 Base = declarative_base()
@@ -14,25 +15,97 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String, nullable=False)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
+    vault_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Версия, до которой надгробия удаленных записей уже вычищены
+    purged_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
 
 class RevokedToken(Base):
     __tablename__ = "revoked_tokens"
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    token: Mapped[str] = mapped_column(String(255), unique=True, index=True)
-    expires_at: Mapped[datetime] = mapped_column(DateTime)
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+
+class KeyRotationCheckpoint(Base):
+    __tablename__ = "key_rotation_checkpoints"
+
+    target_key_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    last_id_entry: Mapped[int] = mapped_column(Integer, default=0)
+    rotated: Mapped[int] = mapped_column(Integer, default=0)
+    # Записи, которые не удалось расшифровать: они пропускаются, чтобы ротация не вставала
+    failed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Аренда: ротацию ведет один процесс, пока не истечет lease_until
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(32))
+    lease_until: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+class JobLease(Base):
+    __tablename__ = "job_leases"
+
+    # Фоновый проход по хранилищу ведет один процесс, пока не истечет lease_until
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(32))
+    lease_until: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
 
 class PasswordEntry(Base):
     __tablename__ = "password_entries"
+    __table_args__ = (
+        Index("ix_password_entries_user_created", "id_user", "created_at", "id_entry"),
+        Index("ix_password_entries_user_version", "id_user", "row_version", "id_entry"),
+        Index("ix_password_entries_user_fingerprint", "id_user", "password_fingerprint"),
+    )
 
     id_entry: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     id_user: Mapped[int] = mapped_column(ForeignKey("users.id_user"))
     website: Mapped[str] = mapped_column(String(255), nullable=False)
-    username: Mapped[str] = mapped_column(String(255))
+    username: Mapped[Optional[str]] = mapped_column(String(255))
     encrypted_password: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
-    notes: Mapped[str] = mapped_column(Text)
+    # HMAC пароля (backend.crypto.password_fingerprint) для поиска повторов без расшифровки
+    password_fingerprint: Mapped[Optional[bytes]] = mapped_column(LargeBinary(16))
+    # Найден ли пароль в корпусе утечек; None — проверка не проводилась
+    breached: Mapped[Optional[bool]] = mapped_column(Boolean)
+    weak: Mapped[Optional[bool]] = mapped_column(Boolean)
+    # None у записей, созданных до появления колонки: тогда берется created_at
+    password_changed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True)
+    # vault_version пользователя на момент последнего изменения записи
+    row_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    user: Mapped["User"] = relationship("User")
+
+
+class VaultStats(Base):
+    # Агрегаты хранилища, которые PasswordRepository обновляет при каждом изменении
+    __tablename__ = "vault_stats"
+
+    id_user: Mapped[int] = mapped_column(ForeignKey("users.id_user"), primary_key=True)
+    entries: Mapped[int] = mapped_column(Integer, default=0)
+    weak: Mapped[int] = mapped_column(Integer, default=0)
+    reused: Mapped[int] = mapped_column(Integer, default=0)
+    breached: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class VaultStatsBucket(Base):
+    # Число записей по месяцам: kind "created" — по created_at,
+    # "changed" — по password_changed_at
+    __tablename__ = "vault_stats_buckets"
 
-    user: Mapped["User"] = relationship("User")
\ No newline at end of file
+    id_user: Mapped[int] = mapped_column(ForeignKey("users.id_user"), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), primary_key=True)
+    month: Mapped[str] = mapped_column(String(7), primary_key=True)
+    entries: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,30 @@
+import base64
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, id_entry: int) -> str:
+    raw = f"{created_at.isoformat()}|{id_entry}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id_entry = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(id_entry)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_change_cursor(row_version: int, id_entry: int) -> str:
+    raw = f"{row_version}|{id_entry}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        row_version, id_entry = raw.split("|")
+        return int(row_version), int(id_entry)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from uuid import uuid4
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from backend.db import new_session
+from backend.dependices import get_current_user
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Запрос администратора с заголовком X-Profile: 1 профилируется всегда
+PROFILE_ON_DEMAND = os.getenv("PROFILE_ON_DEMAND", "0").lower() in ("1", "true", "yes")
+PROFILE_HEADER = b"x-profile"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Старые профили удаляются, когда каталог превышает любой из пределов
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_MAX_BYTES = int(os.getenv("PROFILE_MAX_BYTES", str(50 * 1024 * 1024)))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+MAX_STACK_DEPTH = 128
+
+# Кадры этих модулей — ожидание работы, а не сама работа
+IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+# Циклы рабочих потоков, ждущие задачу в C-очереди: собственного кадра у ожидания нет
+IDLE_FUNCTIONS = {("thread.py", "_worker"), ("core.py", "_connection_worker_thread")}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _thread_stack(frame) -> list[str]:
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_stack(task: asyncio.Task) -> list[str]:
+    # Приостановленная задача: цепочка await от корутины задачи до того,
+    # чего она ждет (ответ БД, пул потоков, сеть)
+    stack = []
+    coro = task.get_coro()
+    while coro is not None and len(stack) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    stack.append("<awaiting>")
+    return stack
+
+
+def _is_idle(frame) -> bool:
+    if frame is None:
+        return True
+    code = frame.f_code
+    return (
+        code.co_filename.endswith(IDLE_MODULES)
+        or (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS
+    )
+
+
+class Profile:
+    def __init__(self, task: asyncio.Task, method: str, path: str):
+        self.id = uuid4().hex[:12]
+        self.task = task
+        self.method = method
+        self.path = path
+        self.samples: Counter[str] = Counter()
+        self.started = time.time()
+
+
+class SamplingProfiler:
+    """Сэмплирующий профайлер запросов на отдельном потоке.
+
+    Пока есть профилируемые запросы, поток раз в interval снимает стеки: стек
+    потока цикла, если сейчас выполняется задача запроса, иначе цепочку await
+    приостановленной задачи. Занятые рабочие потоки (bcrypt, шифрование,
+    aiosqlite) добавляются, только когда профилируется один запрос, иначе их
+    работу нельзя однозначно отнести к запросу.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._profiles: dict[str, Profile] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+
+    def begin(self, method: str, path: str) -> Profile:
+        profile = Profile(asyncio.current_task(), method, path)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._profiles[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+        return profile
+
+    def end(self, profile: Profile):
+        with self._lock:
+            self._profiles.pop(profile.id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                profiles = list(self._profiles.values())
+                if not profiles:
+                    self._thread = None
+                    return
+            self._sample(profiles)
+
+    def _sample(self, profiles: list[Profile]):
+        frames = sys._current_frames()
+        current = asyncio.current_task(self._loop)
+        for profile in profiles:
+            if profile.task is current:
+                stack = _thread_stack(frames.get(self._loop_thread_id))
+            else:
+                stack = _await_stack(profile.task)
+            profile.samples[";".join(stack)] += 1
+
+        if len(profiles) != 1:
+            return
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in frames.items():
+            if ident in (own, self._loop_thread_id) or _is_idle(frame):
+                continue
+            stack = [f"<thread {names.get(ident, ident)}>"] + _thread_stack(frame)
+            profiles[0].samples[";".join(stack)] += 1
+
+
+def write_collapsed(profile: Profile, route: str, elapsed: float) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_route = "".join(ch if ch.isalnum() else "_" for ch in route).strip("_") or "root"
+    name = f"{int(profile.started)}-{profile.method}-{safe_route}-{profile.id}.collapsed"
+    path = os.path.join(PROFILE_DIR, name)
+    with open(path, "w") as f:
+        f.write(f"# {profile.method} {profile.path} {elapsed:.6f}s\n")
+        for stack, count in profile.samples.most_common():
+            f.write(f"{stack} {count}\n")
+    prune_profiles()
+    return path
+
+
+def prune_profiles():
+    profiles = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.name.endswith(".collapsed"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            profiles.append((stat.st_mtime, stat.st_size, entry.path))
+    profiles.sort(reverse=True)
+
+    total = 0
+    for index, (_, size, path) in enumerate(profiles):
+        total += size
+        if index >= PROFILE_MAX_FILES or total > PROFILE_MAX_BYTES:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Параллельный запрос уже удалил этот файл
+                pass
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilerMiddleware:
+    """Профилирует долю PROFILE_SAMPLE_RATE запросов и запросы администраторов
+    с заголовком X-Profile; стеки пишутся в PROFILE_DIR в формате collapsed
+    (flamegraph.pl, speedscope, inferno)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def _wants_profile(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if PROFILE_ON_DEMAND and headers.get(PROFILE_HEADER) == b"1":
+            return await self._is_admin(headers.get(b"authorization", b"").decode("latin-1"))
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    @staticmethod
+    async def _is_admin(authorization: str) -> bool:
+        # Профиль раскрывает код и данные запроса, поэтому заголовок учитывается
+        # только с токеном администратора; авторизацию самого запроса
+        # по-прежнему проверяет маршрут
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        async with new_session() as session:
+            try:
+                user = await get_current_user(token, session)
+            except HTTPException:
+                return False
+        return user.is_admin
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.begin(scope["method"], scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            profiler.end(profile)
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            try:
+                path = await run_in_threadpool(write_collapsed, profile, route, elapsed)
+                logger.info("Profiled %s %s in %.3fs: %s", profile.method, profile.path, elapsed, path)
+            except OSError:
+                logger.exception("Failed to write profile %s", profile.id)
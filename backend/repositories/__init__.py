@@ -1,3 +1,6 @@
 from .user import UserRepository, RevokedTokenRepository
 from .passa import PasswordEntryCreate, PasswordEntry, PasswordRepository
-__all__ = ("UserRepository", "RevokedTokenRepository", "PasswordEntryCreate", "PasswordEntry", "PasswordRepository")
+from .rotation import KeyRotationRepository
+from .jobs import JobLeaseRepository
+from .stats import VaultStatsRepository
+__all__ = ("UserRepository", "RevokedTokenRepository", "PasswordEntryCreate", "PasswordEntry", "PasswordRepository", "KeyRotationRepository", "JobLeaseRepository", "VaultStatsRepository")
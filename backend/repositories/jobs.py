@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import JobLease
+
+
+class JobLeaseRepository:
+    @staticmethod
+    async def acquire(session: AsyncSession, name: str, owner: str, lease: timedelta) -> bool:
+        """Берет аренду задачи. False — задачу уже ведет другой процесс."""
+        if await session.get(JobLease, name) is None:
+            session.add(JobLease(name=name))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Строку одновременно создал другой процесс
+                await session.rollback()
+        return await JobLeaseRepository.renew(session, name, owner, lease, take_expired=True)
+
+    @staticmethod
+    async def renew(
+        session: AsyncSession, name: str, owner: str, lease: timedelta, take_expired: bool = False
+    ) -> bool:
+        now = datetime.utcnow()
+        held = JobLease.lease_owner == owner
+        if take_expired:
+            held = or_(held, JobLease.lease_until.is_(None), JobLease.lease_until < now)
+        result = await session.execute(
+            update(JobLease)
+            .where(JobLease.name == name)
+            .where(held)
+            .values(lease_owner=owner, lease_until=now + lease)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    async def release(session: AsyncSession, name: str, owner: str):
+        await session.execute(
+            update(JobLease)
+            .where(JobLease.name == name)
+            .where(JobLease.lease_owner == owner)
+            .values(lease_owner=None, lease_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
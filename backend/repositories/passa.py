@@ -1,25 +1,153 @@
-from cryptography.fernet import Fernet
+import asyncio
+from datetime import datetime, timedelta
 import os
+import time
 
 from dotenv import load_dotenv
-from sqlalchemy import select, delete, update
+from sqlalchemy import bindparam, select, delete, func, insert, or_, update, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from backend.models import PasswordEntry
+from backend.breach import breach_corpus
+from backend.crypto import DecryptionError, password_fingerprint, vault_cipher
+from backend.strength import is_weak_password
+from backend.metrics import observe_crypto
+from backend.models import PasswordEntry, User
+from backend.repositories.stats import VaultStatsRepository
 from backend.schemas import PasswordEntryCreate
+from backend.search import (
+    DELETE_SEARCH_ROW,
+    INSERT_SEARCH_ROW,
+    SEARCH_MIN_TERM,
+    build_match_queries,
+    search_match,
+    search_rank,
+    search_table,
+    supports_search_index,
+    user_rowid_range,
+)
 
 load_dotenv()
 
+CRYPTO_BATCH_WORKERS = int(os.getenv("CRYPTO_BATCH_WORKERS", "4"))
+VAULT_UPGRADE_ON_READ = os.getenv("VAULT_UPGRADE_ON_READ", "1").lower() in ("1", "true", "yes")
+
+
 class PasswordRepository:
-    _fernet = Fernet("W9Er9gRuwAQRM4AtdBX5cQ_5Z-3XZ3bwM5SZ3yH0z2Q=")
+    _cipher = vault_cipher
+
+    # Колонки PasswordEntryResponse: список никогда не читает encrypted_password
+    LIST_COLUMNS = (
+        PasswordEntry.id_entry,
+        PasswordEntry.website,
+        PasswordEntry.username,
+        PasswordEntry.notes,
+        PasswordEntry.created_at,
+    )
 
     @classmethod
     def _encrypt_password(cls, password: str) -> bytes:
-        return cls._fernet.encrypt(password.encode())
+        started = time.perf_counter()
+        token = cls._cipher.encrypt(password)
+        observe_crypto("vault_encrypt", time.perf_counter() - started)
+        return token
 
     @classmethod
     def _decrypt_password(cls, encrypted_password: bytes) -> str:
-        return cls._fernet.decrypt(encrypted_password).decode()
+        started = time.perf_counter()
+        password = cls._cipher.decrypt(encrypted_password)
+        observe_crypto("vault_decrypt", time.perf_counter() - started)
+        return password
+
+    @staticmethod
+    def _fingerprint(id_user: int, password: str) -> bytes:
+        return password_fingerprint(id_user, password)
+
+    @staticmethod
+    def _is_breached(password: str) -> bool | None:
+        if breach_corpus is None:
+            return None
+        return breach_corpus.contains(password)
+
+    @staticmethod
+    def _password_checks(id_user: int, password: str) -> dict:
+        # Поля, которые вычисляются из пароля при каждой его смене
+        return {
+            "password_fingerprint": PasswordRepository._fingerprint(id_user, password),
+            "breached": PasswordRepository._is_breached(password),
+            "weak": is_weak_password(password),
+        }
+
+    @classmethod
+    def _encrypt_batch(cls, passwords: list[str]) -> list[bytes]:
+        return [cls._encrypt_password(password) for password in passwords]
+
+    @classmethod
+    def _decrypt_batch(cls, encrypted_passwords: list[bytes]) -> list[str]:
+        return [cls._decrypt_password(token) for token in encrypted_passwords]
+
+    @classmethod
+    def _try_decrypt_batch(cls, encrypted_passwords: list[bytes]) -> list[str | None]:
+        # None вместо пароля, который нельзя расшифровать (например, его ключ
+        # убран из VAULT_KEYS): фоновые проходы пропускают такие записи
+        passwords = []
+        for token in encrypted_passwords:
+            try:
+                passwords.append(cls._decrypt_password(token))
+            except DecryptionError:
+                passwords.append(None)
+        return passwords
+
+    @classmethod
+    async def _encrypt_many(cls, passwords: list[str]) -> list[bytes]:
+        size = max(1, -(-len(passwords) // CRYPTO_BATCH_WORKERS))
+        batches = await asyncio.gather(
+            *(
+                run_in_threadpool(cls._encrypt_batch, passwords[i:i + size])
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [token for batch in batches for token in batch]
+
+    @staticmethod
+    async def _index_entries(session: AsyncSession, rows: list[dict]):
+        if rows and supports_search_index(session.get_bind()):
+            await session.execute(INSERT_SEARCH_ROW, rows)
+
+    @staticmethod
+    async def _unindex_entries(session: AsyncSession, id_user: int, entry_ids: list[int]):
+        if entry_ids and supports_search_index(session.get_bind()):
+            await session.execute(
+                DELETE_SEARCH_ROW,
+                [{"id_user": id_user, "id_entry": entry_id} for entry_id in entry_ids],
+            )
+
+    @staticmethod
+    async def _bump_vault_version(session: AsyncSession, id_user: int) -> int:
+        result = await session.execute(
+            update(User)
+            .where(User.id_user == id_user)
+            .values(vault_version=User.vault_version + 1)
+            .returning(User.vault_version)
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    async def get_vault_version(session: AsyncSession, id_user: int) -> int:
+        result = await session.execute(
+            select(User.vault_version).where(User.id_user == id_user)
+        )
+        return result.scalar_one_or_none() or 0
+
+    @staticmethod
+    def _search_row(entry: PasswordEntry) -> dict:
+        return {
+            "id_entry": entry.id_entry,
+            "id_user": entry.id_user,
+            "website": entry.website,
+            "username": entry.username,
+            "notes": entry.notes,
+        }
 
     @staticmethod
     async def create_password_entry(
@@ -28,26 +156,155 @@ class PasswordRepository:
         entry_data: PasswordEntryCreate,
     ):
         encrypted_password = PasswordRepository._encrypt_password(entry_data.password)
+        version = await PasswordRepository._bump_vault_version(session, id_user)
         new_entry = PasswordEntry(
             id_user=id_user,
             website=entry_data.website,
             username=entry_data.username,
             encrypted_password=encrypted_password,
             notes=entry_data.notes,
+            row_version=version,
+            **PasswordRepository._password_checks(id_user, entry_data.password),
         )
         session.add(new_entry)
+        await session.flush()
+        await PasswordRepository._index_entries(
+            session, [PasswordRepository._search_row(new_entry)]
+        )
+        await VaultStatsRepository.apply(
+            session, [], await VaultStatsRepository.snapshot(session, [new_entry.id_entry])
+        )
         await session.commit()
         await session.refresh(new_entry)
         return new_entry
 
     @staticmethod
-    async def get_user_entries(session: AsyncSession, id_user: int):
+    async def import_entries(
+        session: AsyncSession,
+        id_user: int,
+        entries: list[PasswordEntryCreate],
+    ) -> int:
+        encrypted_passwords = await PasswordRepository._encrypt_many(
+            [entry.password for entry in entries]
+        )
+        version = await PasswordRepository._bump_vault_version(session, id_user)
+        rows = [
+            {
+                "id_user": id_user,
+                "website": entry.website,
+                "username": entry.username,
+                "encrypted_password": encrypted_password,
+                "notes": entry.notes,
+                "row_version": version,
+                **PasswordRepository._password_checks(id_user, entry.password),
+            }
+            for entry, encrypted_password in zip(entries, encrypted_passwords)
+        ]
+        entry_ids = await session.scalars(
+            insert(PasswordEntry)
+            .returning(PasswordEntry.id_entry, sort_by_parameter_order=True),
+            rows,
+        )
+        for row, entry_id in zip(rows, entry_ids):
+            row["id_entry"] = entry_id
+        await PasswordRepository._index_entries(session, rows)
+        await VaultStatsRepository.apply(
+            session, [], await VaultStatsRepository.snapshot(session, [row["id_entry"] for row in rows])
+        )
+        await session.commit()
+        return len(entries)
+
+    @staticmethod
+    async def get_user_entries(
+        session: AsyncSession,
+        id_user: int,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+    ):
+        stmt = (
+            select(*PasswordRepository.LIST_COLUMNS)
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .order_by(PasswordEntry.created_at.desc(), PasswordEntry.id_entry.desc())
+        )
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(PasswordEntry.created_at, PasswordEntry.id_entry) < after
+            )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await session.execute(stmt)
+        return result.all()
+
+    @staticmethod
+    async def stream_user_entries(session: AsyncSession, id_user: int, batch_size: int):
+        result = await session.stream(
+            select(*PasswordRepository.LIST_COLUMNS, PasswordEntry.encrypted_password)
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .order_by(PasswordEntry.id_entry)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            yield rows
+
+    @staticmethod
+    async def search_entries(
+        session: AsyncSession, id_user: int, query: str, limit: int
+    ):
+        queries = build_match_queries(query)
+        if queries is None or not supports_search_index(session.get_bind()):
+            return await PasswordRepository._scan_entries(session, id_user, query, limit)
+
+        first_rowid, last_rowid = user_rowid_range(id_user)
+        rows = []
+        for match in dict.fromkeys(queries):
+            stmt = (
+                select(*PasswordRepository.LIST_COLUMNS)
+                .select_from(search_table)
+                .join(PasswordEntry, PasswordEntry.id_entry == search_table.c.rowid - first_rowid)
+                .where(search_match(match))
+                .where(search_table.c.rowid.between(first_rowid, last_rowid))
+                .order_by(search_rank)
+                .limit(limit)
+            )
+            if rows:
+                stmt = stmt.where(
+                    PasswordEntry.id_entry.not_in([row.id_entry for row in rows])
+                )
+            found = (await session.execute(stmt)).all()
+            rows.extend(found)
+            limit -= len(found)
+            if limit <= 0:
+                break
+        return rows
+
+    @staticmethod
+    async def _scan_entries(
+        session: AsyncSession, id_user: int, query: str, limit: int
+    ):
+        # Короткие запросы (и не-SQLite) — префикс/подстрока без индекса FTS
+        query = query.strip()
+        if len(query) < SEARCH_MIN_TERM:
+            condition = or_(
+                PasswordEntry.website.istartswith(query, autoescape=True),
+                PasswordEntry.username.istartswith(query, autoescape=True),
+            )
+        else:
+            condition = or_(
+                PasswordEntry.website.icontains(query, autoescape=True),
+                PasswordEntry.username.icontains(query, autoescape=True),
+                PasswordEntry.notes.icontains(query, autoescape=True),
+            )
         result = await session.execute(
-            select(PasswordEntry)
+            select(*PasswordRepository.LIST_COLUMNS)
             .where(PasswordEntry.id_user == id_user)
-            .order_by(PasswordEntry.created_at.desc())
+            .where(PasswordEntry.deleted_at.is_(None))
+            .where(condition)
+            .order_by(PasswordEntry.website)
+            .limit(limit)
         )
-        return result.scalars().all()
+        return result.all()
 
     @staticmethod
     async def get_entry_by_id(session: AsyncSession, id_entry: int, id_user: int):
@@ -55,6 +312,7 @@ class PasswordRepository:
             select(PasswordEntry)
             .where(PasswordEntry.id_entry == id_entry)
             .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
         )
         return result.scalars().first()
 
@@ -62,6 +320,84 @@ class PasswordRepository:
     async def decrypt_entry_password(entry: PasswordEntry) -> str:
         return PasswordRepository._decrypt_password(entry.encrypted_password)
 
+    @staticmethod
+    async def decrypt_passwords(encrypted_passwords: list[bytes]) -> list[str]:
+        return await run_in_threadpool(
+            PasswordRepository._decrypt_batch, encrypted_passwords
+        )
+
+    @staticmethod
+    async def try_decrypt_passwords(encrypted_passwords: list[bytes]) -> list[str | None]:
+        return await run_in_threadpool(
+            PasswordRepository._try_decrypt_batch, encrypted_passwords
+        )
+
+    @staticmethod
+    async def _rewrite_ciphertexts(
+        session: AsyncSession, items: list[tuple[int, bytes, str]]
+    ) -> int:
+        # items: (id_entry, старый шифртекст, пароль). Запись переписывается,
+        # только если шифртекст не изменился с момента чтения
+        items = [item for item in items if PasswordRepository._cipher.needs_upgrade(item[1])]
+        if not items:
+            return 0
+        encrypted_passwords = await PasswordRepository._encrypt_many([item[2] for item in items])
+        table = PasswordEntry.__table__
+        result = await session.execute(
+            update(table)
+            .where(table.c.id_entry == bindparam("b_id_entry"))
+            .where(table.c.encrypted_password == bindparam("b_old"))
+            .values(encrypted_password=bindparam("b_new")),
+            [
+                {"b_id_entry": entry_id, "b_old": old, "b_new": new}
+                for (entry_id, old, _), new in zip(items, encrypted_passwords)
+            ],
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def upgrade_ciphertexts(
+        session: AsyncSession, items: list[tuple[int, bytes, str]]
+    ) -> int:
+        if not VAULT_UPGRADE_ON_READ:
+            return 0
+        upgraded = await PasswordRepository._rewrite_ciphertexts(session, items)
+        if upgraded:
+            await session.commit()
+        return upgraded
+
+    @staticmethod
+    async def reencrypt_batch(
+        session: AsyncSession, after_id: int, batch_size: int
+    ) -> tuple[int | None, int, int, list[int]]:
+        # Один шаг ротации ключей: (последний id, просмотрено, перешифровано,
+        # id записей, которые не удалось расшифровать)
+        result = await session.execute(
+            select(PasswordEntry.id_entry, PasswordEntry.encrypted_password)
+            .where(PasswordEntry.id_entry > after_id)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .order_by(PasswordEntry.id_entry)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return None, 0, 0, []
+
+        stale = [row for row in rows if PasswordRepository._cipher.needs_upgrade(row.encrypted_password)]
+        passwords = await PasswordRepository.try_decrypt_passwords(
+            [row.encrypted_password for row in stale]
+        )
+        rewritten = await PasswordRepository._rewrite_ciphertexts(
+            session,
+            [
+                (row.id_entry, row.encrypted_password, password)
+                for row, password in zip(stale, passwords)
+                if password is not None
+            ],
+        )
+        failed = [row.id_entry for row, password in zip(stale, passwords) if password is None]
+        return rows[-1].id_entry, len(rows), rewritten, failed
+
     @staticmethod
     async def update_password_entry(
             session: AsyncSession,
@@ -70,21 +406,35 @@ class PasswordRepository:
             update_data: dict
     ):
         if 'password' in update_data:
-            update_data['encrypted_password'] = PasswordRepository._encrypt_password(update_data.pop('password'))
+            password = update_data.pop('password')
+            update_data['encrypted_password'] = PasswordRepository._encrypt_password(password)
+            update_data['password_changed_at'] = datetime.utcnow()
+            update_data.update(PasswordRepository._password_checks(user_id, password))
+        update_data['row_version'] = await PasswordRepository._bump_vault_version(session, user_id)
+        before = await VaultStatsRepository.snapshot(session, [entry_id], lock=True)
 
         stmt = (
             update(PasswordEntry)
             .where(
                 (PasswordEntry.id_entry == entry_id) &
-                (PasswordEntry.id_user == user_id)
+                (PasswordEntry.id_user == user_id) &
+                PasswordEntry.deleted_at.is_(None)
             )
             .values(**update_data)
             .returning(PasswordEntry)
         )
 
         result = await session.execute(stmt)
+        entry = result.scalar_one()
+        await PasswordRepository._unindex_entries(session, entry.id_user, [entry.id_entry])
+        await PasswordRepository._index_entries(
+            session, [PasswordRepository._search_row(entry)]
+        )
+        await VaultStatsRepository.apply(
+            session, before, await VaultStatsRepository.snapshot(session, [entry.id_entry])
+        )
         await session.commit()
-        return result.scalar_one()
+        return entry
 
     @staticmethod
     async def delete_password_entry(
@@ -92,12 +442,374 @@ class PasswordRepository:
             entry_id: int,
             user_id: int
     ):
+        # Мягкое удаление: надгробие нужно для /passwords/changes/, секреты стираются сразу
+        version = await PasswordRepository._bump_vault_version(session, user_id)
+        before = await VaultStatsRepository.snapshot(session, [entry_id], lock=True)
         stmt = (
-            delete(PasswordEntry)
+            update(PasswordEntry)
             .where(
                 (PasswordEntry.id_entry == entry_id) &
-                (PasswordEntry.id_user == user_id)
+                (PasswordEntry.id_user == user_id) &
+                PasswordEntry.deleted_at.is_(None)
+            )
+            .values(
+                deleted_at=datetime.utcnow(),
+                row_version=version,
+                encrypted_password=b"",
+                password_fingerprint=None,
+                notes=None,
             )
+            .returning(PasswordEntry.id_entry)
         )
-        await session.execute(stmt)
-        await session.commit()
\ No newline at end of file
+        # Запись, которую уже удалил параллельный запрос, не вычитается повторно
+        deleted = set((await session.execute(stmt)).scalars())
+        await PasswordRepository._unindex_entries(session, user_id, [entry_id])
+        await VaultStatsRepository.apply(
+            session, [row for row in before if row.id_entry in deleted], []
+        )
+        await session.commit()
+
+    @staticmethod
+    async def apply_batch(
+        session: AsyncSession,
+        id_user: int,
+        get_ids: list[int],
+        updates: list[dict],
+        delete_ids: list[int],
+    ) -> dict:
+        requested = {*get_ids, *delete_ids, *(item["id_entry"] for item in updates)}
+        result = await session.execute(
+            select(PasswordEntry.id_entry)
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .where(PasswordEntry.id_entry.in_(requested))
+        )
+        owned = set(result.scalars())
+        updates = [item for item in updates if item["id_entry"] in owned]
+        delete_ids = [entry_id for entry_id in dict.fromkeys(delete_ids) if entry_id in owned]
+        get_ids = [entry_id for entry_id in dict.fromkeys(get_ids) if entry_id in owned]
+
+        changed_ids = [item["id_entry"] for item in updates] + delete_ids
+        version = None
+        before = []
+        if changed_ids:
+            version = await PasswordRepository._bump_vault_version(session, id_user)
+            before = await VaultStatsRepository.snapshot(session, changed_ids, lock=True)
+
+        if updates:
+            await PasswordRepository._apply_batch_updates(session, id_user, updates, version)
+
+        entries = {}
+        if get_ids:
+            result = await session.execute(
+                select(*PasswordRepository.LIST_COLUMNS, PasswordEntry.encrypted_password)
+                .where(PasswordEntry.id_user == id_user)
+                .where(PasswordEntry.id_entry.in_(get_ids))
+            )
+            rows = result.all()
+            passwords = await PasswordRepository.decrypt_passwords(
+                [row.encrypted_password for row in rows]
+            )
+            entries = {row.id_entry: (row, password) for row, password in zip(rows, passwords)}
+            if VAULT_UPGRADE_ON_READ:
+                await PasswordRepository._rewrite_ciphertexts(
+                    session,
+                    [(row.id_entry, row.encrypted_password, password) for row, password in zip(rows, passwords)],
+                )
+
+        deleted = set()
+        if delete_ids:
+            result = await session.execute(
+                update(PasswordEntry)
+                .where(PasswordEntry.id_user == id_user)
+                .where(PasswordEntry.id_entry.in_(delete_ids))
+                .where(PasswordEntry.deleted_at.is_(None))
+                .values(
+                    deleted_at=datetime.utcnow(),
+                    row_version=version,
+                    encrypted_password=b"",
+                    password_fingerprint=None,
+                    notes=None,
+                )
+                .returning(PasswordEntry.id_entry)
+            )
+            deleted = set(result.scalars())
+            await PasswordRepository._unindex_entries(session, id_user, delete_ids)
+
+        if changed_ids:
+            # Учитываются только записи, которые пакет действительно изменил
+            after = await VaultStatsRepository.snapshot(session, changed_ids)
+            affected = deleted | {row.id_entry for row in after}
+            await VaultStatsRepository.apply(
+                session, [row for row in before if row.id_entry in affected], after
+            )
+        await session.commit()
+        return {
+            "get": entries,
+            "update": {item["id_entry"] for item in updates},
+            "delete": set(delete_ids),
+        }
+
+    @staticmethod
+    async def _apply_batch_updates(
+        session: AsyncSession, id_user: int, updates: list[dict], version: int
+    ):
+        with_password = [item for item in updates if item.get("password") is not None]
+        encrypted_passwords = await PasswordRepository._encrypt_many(
+            [item["password"] for item in with_password]
+        )
+        changed_at = datetime.utcnow()
+        for item, encrypted_password in zip(with_password, encrypted_passwords):
+            item["encrypted_password"] = encrypted_password
+            item["password_changed_at"] = changed_at
+            item.update(PasswordRepository._password_checks(id_user, item["password"]))
+        for item in updates:
+            item.pop("password", None)
+
+        # executemany требует одинаковый набор колонок, поэтому строки
+        # группируются по списку изменяемых полей
+        groups = {}
+        for item in updates:
+            fields = tuple(sorted(key for key in item if key != "id_entry"))
+            groups.setdefault(fields, []).append(item)
+
+        table = PasswordEntry.__table__
+        for fields, items in groups.items():
+            stmt = (
+                update(table)
+                .where(table.c.id_entry == bindparam("b_id_entry"))
+                .where(table.c.id_user == id_user)
+                .where(table.c.deleted_at.is_(None))
+                .values(row_version=version, **{field: bindparam(f"b_{field}") for field in fields})
+            )
+            await session.execute(
+                stmt,
+                [
+                    {f"b_{key}": value for key, value in item.items()}
+                    for item in items
+                ],
+            )
+
+        updated_ids = [item["id_entry"] for item in updates]
+        result = await session.execute(
+            select(PasswordEntry.id_entry, PasswordEntry.id_user, PasswordEntry.website,
+                   PasswordEntry.username, PasswordEntry.notes)
+            .where(PasswordEntry.id_entry.in_(updated_ids))
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
+        )
+        await PasswordRepository._unindex_entries(session, id_user, updated_ids)
+        await PasswordRepository._index_entries(
+            session, [dict(row._mapping) for row in result]
+        )
+
+    @staticmethod
+    async def _apply_rewrite_stats(session: AsyncSession, rows: list, before: list):
+        # rows — (id_entry, encrypted_password) на момент чтения. Запись, которую
+        # параллельно изменили или удалили, фоновый проход не обновил
+        # (compare-and-set по шифртексту), и ее дельту уже учел изменивший запрос
+        result = await session.execute(
+            select(PasswordEntry.id_entry, PasswordEntry.encrypted_password)
+            .where(PasswordEntry.id_entry.in_([row.id_entry for row in rows]))
+            .where(PasswordEntry.deleted_at.is_(None))
+        )
+        current = dict(result.all())
+        updated = [
+            row.id_entry for row in rows if current.get(row.id_entry) == row.encrypted_password
+        ]
+        kept = set(updated)
+        await VaultStatsRepository.apply(
+            session,
+            [row for row in before if row.id_entry in kept],
+            await VaultStatsRepository.snapshot(session, updated),
+        )
+
+    @staticmethod
+    async def get_reused_entries(session: AsyncSession, id_user: int):
+        # Группы с одинаковым отпечатком находит один GROUP BY по индексу
+        # (id_user, password_fingerprint); строки идут подряд по группам
+        reused = (
+            select(PasswordEntry.password_fingerprint)
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.password_fingerprint.is_not(None))
+            .group_by(PasswordEntry.password_fingerprint)
+            .having(func.count() > 1)
+        )
+        result = await session.execute(
+            select(*PasswordRepository.LIST_COLUMNS, PasswordEntry.password_fingerprint)
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .where(PasswordEntry.password_fingerprint.in_(reused))
+            .order_by(PasswordEntry.password_fingerprint, PasswordEntry.id_entry)
+        )
+        return result.all()
+
+    @staticmethod
+    async def backfill_fingerprints(
+        session: AsyncSession, after_id: int, batch_size: int, recompute: bool = False
+    ) -> tuple[int | None, int, list[int]]:
+        # Один шаг заполнения отпечатков и признака слабого пароля: (последний id,
+        # обновлено, id записей, которые не удалось расшифровать)
+        stmt = (
+            select(PasswordEntry.id_entry, PasswordEntry.id_user, PasswordEntry.encrypted_password)
+            .where(PasswordEntry.id_entry > after_id)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .order_by(PasswordEntry.id_entry)
+            .limit(batch_size)
+        )
+        if not recompute:
+            stmt = stmt.where(
+                or_(PasswordEntry.password_fingerprint.is_(None), PasswordEntry.weak.is_(None))
+            )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return None, 0, []
+
+        # Нерасшифровываемые записи пропускаются, как в reencrypt_batch:
+        # иначе одна такая запись останавливала бы проход на этом пакете
+        passwords = await PasswordRepository.try_decrypt_passwords(
+            [row.encrypted_password for row in rows]
+        )
+        failed = [row.id_entry for row, password in zip(rows, passwords) if password is None]
+        readable = [(row, password) for row, password in zip(rows, passwords) if password is not None]
+        if not readable:
+            return rows[-1].id_entry, 0, failed
+
+        entry_ids = [row.id_entry for row, _ in readable]
+        before = await VaultStatsRepository.snapshot(session, entry_ids)
+        table = PasswordEntry.__table__
+        # Запись, измененная после чтения, уже получила отпечаток при изменении
+        result = await session.execute(
+            update(table)
+            .where(table.c.id_entry == bindparam("b_id_entry"))
+            .where(table.c.encrypted_password == bindparam("b_old"))
+            .values(password_fingerprint=bindparam("b_fingerprint"), weak=bindparam("b_weak")),
+            [
+                {
+                    "b_id_entry": row.id_entry,
+                    "b_old": row.encrypted_password,
+                    "b_fingerprint": PasswordRepository._fingerprint(row.id_user, password),
+                    "b_weak": is_weak_password(password),
+                }
+                for row, password in readable
+            ],
+        )
+        await PasswordRepository._apply_rewrite_stats(session, [row for row, _ in readable], before)
+        await session.commit()
+        return rows[-1].id_entry, result.rowcount, failed
+
+    @staticmethod
+    async def get_breached_entries(session: AsyncSession, id_user: int):
+        result = await session.execute(
+            select(*PasswordRepository.LIST_COLUMNS)
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .where(PasswordEntry.breached.is_(True))
+            .order_by(PasswordEntry.id_entry)
+        )
+        return result.all()
+
+    @staticmethod
+    async def recheck_breaches(
+        session: AsyncSession, after_id: int, batch_size: int, recompute: bool = False
+    ) -> tuple[int | None, int, list[int]]:
+        # Один шаг проверки по корпусу: (последний id, найдено утечек,
+        # id записей, которые не удалось расшифровать)
+        if breach_corpus is None:
+            return None, 0, []
+        stmt = (
+            select(PasswordEntry.id_entry, PasswordEntry.encrypted_password)
+            .where(PasswordEntry.id_entry > after_id)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .order_by(PasswordEntry.id_entry)
+            .limit(batch_size)
+        )
+        if not recompute:
+            stmt = stmt.where(PasswordEntry.breached.is_(None))
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return None, 0, []
+
+        # Как в backfill_fingerprints: нерасшифровываемые записи пропускаются
+        passwords = await PasswordRepository.try_decrypt_passwords(
+            [row.encrypted_password for row in rows]
+        )
+        failed = [row.id_entry for row, password in zip(rows, passwords) if password is None]
+        readable = [(row, password) for row, password in zip(rows, passwords) if password is not None]
+        if not readable:
+            return rows[-1].id_entry, 0, failed
+
+        checked = [row for row, _ in readable]
+        flags = [breach_corpus.contains(password) for _, password in readable]
+        entry_ids = [row.id_entry for row in checked]
+        before = await VaultStatsRepository.snapshot(session, entry_ids)
+        table = PasswordEntry.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id_entry == bindparam("b_id_entry"))
+            .where(table.c.encrypted_password == bindparam("b_old"))
+            .values(breached=bindparam("b_breached")),
+            [
+                {"b_id_entry": row.id_entry, "b_old": row.encrypted_password, "b_breached": flag}
+                for row, flag in zip(checked, flags)
+            ],
+        )
+        await PasswordRepository._apply_rewrite_stats(session, checked, before)
+        await session.commit()
+        return rows[-1].id_entry, sum(flags), failed
+
+    @staticmethod
+    async def get_purged_version(session: AsyncSession, id_user: int) -> int:
+        result = await session.execute(
+            select(User.purged_version).where(User.id_user == id_user)
+        )
+        return result.scalar_one_or_none() or 0
+
+    @staticmethod
+    async def get_changes(
+        session: AsyncSession,
+        id_user: int,
+        since: int,
+        limit: int,
+        after: tuple[int, int] | None = None,
+    ):
+        stmt = (
+            select(*PasswordRepository.LIST_COLUMNS, PasswordEntry.row_version, PasswordEntry.deleted_at)
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.row_version > since)
+            .order_by(PasswordEntry.row_version, PasswordEntry.id_entry)
+            .limit(limit)
+        )
+        if since == 0:
+            stmt = stmt.where(PasswordEntry.deleted_at.is_(None))
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(PasswordEntry.row_version, PasswordEntry.id_entry) > after
+            )
+        result = await session.execute(stmt)
+        return result.all()
+
+    @staticmethod
+    async def purge_tombstones(session: AsyncSession, retention: timedelta) -> int:
+        cutoff = datetime.utcnow() - retention
+        result = await session.execute(
+            select(PasswordEntry.id_user, func.max(PasswordEntry.row_version))
+            .where(PasswordEntry.deleted_at < cutoff)
+            .group_by(PasswordEntry.id_user)
+        )
+        purged = result.all()
+        if not purged:
+            return 0
+
+        for id_user, version in purged:
+            await session.execute(
+                update(User)
+                .where(User.id_user == id_user)
+                .where(User.purged_version < version)
+                .values(purged_version=version)
+            )
+        result = await session.execute(
+            delete(PasswordEntry).where(PasswordEntry.deleted_at < cutoff)
+        )
+        await session.commit()
+        return result.rowcount
\ No newline at end of file
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import KeyRotationCheckpoint
+
+
+class KeyRotationRepository:
+    @staticmethod
+    async def get_checkpoint(session: AsyncSession, target_key_id: int) -> KeyRotationCheckpoint:
+        checkpoint = await session.get(KeyRotationCheckpoint, target_key_id)
+        if checkpoint is None:
+            session.add(
+                KeyRotationCheckpoint(target_key_id=target_key_id, last_id_entry=0, rotated=0, failed=0)
+            )
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Чекпоинт одновременно создал другой процесс
+                await session.rollback()
+            checkpoint = await session.get(KeyRotationCheckpoint, target_key_id)
+        return checkpoint
+
+    @staticmethod
+    async def claim(
+        session: AsyncSession, target_key_id: int, owner: str, lease: timedelta
+    ) -> KeyRotationCheckpoint | None:
+        """Берет аренду чекпоинта. None — ротацию уже ведет другой процесс;
+        у завершенной ротации чекпоинт возвращается без аренды."""
+        checkpoint = await KeyRotationRepository.get_checkpoint(session, target_key_id)
+        if checkpoint.finished_at is not None:
+            return checkpoint
+        now = datetime.utcnow()
+        result = await session.execute(
+            update(KeyRotationCheckpoint)
+            .where(KeyRotationCheckpoint.target_key_id == target_key_id)
+            .where(
+                or_(
+                    KeyRotationCheckpoint.lease_until.is_(None),
+                    KeyRotationCheckpoint.lease_until < now,
+                    KeyRotationCheckpoint.lease_owner == owner,
+                )
+            )
+            .values(lease_owner=owner, lease_until=now + lease)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        if result.rowcount == 0:
+            return None
+        return await session.get(KeyRotationCheckpoint, target_key_id, populate_existing=True)
+
+    @staticmethod
+    async def advance(
+        session: AsyncSession,
+        target_key_id: int,
+        owner: str,
+        last_id_entry: int | None,
+        rotated: int,
+        failed: int,
+        lease: timedelta,
+    ) -> bool:
+        """Фиксирует пакет вместе с продвижением чекпоинта и продлевает аренду.
+        False — аренду перехватил другой процесс, пакет откатывается."""
+        now = datetime.utcnow()
+        values = {
+            "rotated": KeyRotationCheckpoint.rotated + rotated,
+            "failed": KeyRotationCheckpoint.failed + failed,
+        }
+        if last_id_entry is None:
+            values.update(finished_at=now, lease_owner=None, lease_until=None)
+        else:
+            values.update(last_id_entry=last_id_entry, lease_until=now + lease)
+        result = await session.execute(
+            update(KeyRotationCheckpoint)
+            .where(KeyRotationCheckpoint.target_key_id == target_key_id)
+            .where(KeyRotationCheckpoint.lease_owner == owner)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            await session.rollback()
+            return False
+        await session.commit()
+        return True
+
+    @staticmethod
+    async def release(session: AsyncSession, target_key_id: int, owner: str):
+        await session.execute(
+            update(KeyRotationCheckpoint)
+            .where(KeyRotationCheckpoint.target_key_id == target_key_id)
+            .where(KeyRotationCheckpoint.lease_owner == owner)
+            .values(lease_owner=None, lease_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
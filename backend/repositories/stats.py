@@ -0,0 +1,251 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import PasswordEntry, User, VaultStats, VaultStatsBucket
+
+CREATED = "created"
+CHANGED = "changed"
+COUNTERS = ("entries", "weak", "reused", "breached")
+REBUILD_BATCH = 5000
+
+CHANGED_AT = func.coalesce(PasswordEntry.password_changed_at, PasswordEntry.created_at).label(
+    "changed_at"
+)
+STATS_COLUMNS = (
+    PasswordEntry.id_entry,
+    PasswordEntry.id_user,
+    PasswordEntry.created_at,
+    CHANGED_AT,
+    PasswordEntry.weak,
+    PasswordEntry.breached,
+    PasswordEntry.password_fingerprint,
+)
+
+
+def _upsert(session: AsyncSession, model):
+    # INSERT ... ON CONFLICT: параллельные запросы не падают на первичном
+    # ключе строки, которую успел создать соседний. Поддерживаемые БД —
+    # SQLite и Postgres (см. backend.db)
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def month_key(value: datetime) -> str:
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def _reused(count: int) -> int:
+    return count if count > 1 else 0
+
+
+class VaultStatsRepository:
+    """Агрегаты хранилища без сканирования записей.
+
+    Изменяющий метод снимает snapshot() затронутых записей до и после
+    изменения и передает оба в apply() в той же транзакции. Снимок «до»
+    берется после первой записи транзакции и с lock=True: в SQLite писатель
+    уже держит блокировку БД, в Postgres строки блокируются FOR UPDATE, так
+    что параллельное изменение тех же записей не даст устаревшего «до».
+    В снимки попадают только записи, которые изменение действительно
+    затронуло (RETURNING / rowcount). Пока у
+    пользователя нет строки vault_stats, инкрементальные обновления
+    пропускаются; ее создает rebuild().
+    """
+
+    @staticmethod
+    async def snapshot(session: AsyncSession, entry_ids, lock: bool = False) -> list:
+        entry_ids = list(entry_ids)
+        if not entry_ids:
+            return []
+        stmt = (
+            select(*STATS_COLUMNS)
+            .where(PasswordEntry.id_entry.in_(entry_ids))
+            .where(PasswordEntry.deleted_at.is_(None))
+        )
+        if lock:
+            stmt = stmt.with_for_update()
+        result = await session.execute(stmt)
+        return result.all()
+
+    @staticmethod
+    async def apply(session: AsyncSession, before: list, after: list):
+        users = {row.id_user for row in before} | {row.id_user for row in after}
+        for id_user in users:
+            await VaultStatsRepository._apply_user(
+                session,
+                id_user,
+                [row for row in before if row.id_user == id_user],
+                [row for row in after if row.id_user == id_user],
+            )
+
+    @staticmethod
+    async def _apply_user(session: AsyncSession, id_user: int, before: list, after: list):
+        deltas = {
+            "entries": len(after) - len(before),
+            "weak": sum(bool(row.weak) for row in after) - sum(bool(row.weak) for row in before),
+            "breached": sum(bool(row.breached) for row in after)
+            - sum(bool(row.breached) for row in before),
+            "reused": await VaultStatsRepository._reused_delta(session, id_user, before, after),
+        }
+        deltas = {key: value for key, value in deltas.items() if value}
+
+        buckets = Counter()
+        for sign, rows in ((1, after), (-1, before)):
+            for row in rows:
+                buckets[(CREATED, month_key(row.created_at))] += sign
+                buckets[(CHANGED, month_key(row.changed_at))] += sign
+        buckets = {key: value for key, value in buckets.items() if value}
+        if not deltas and not buckets:
+            return
+
+        result = await session.execute(
+            update(VaultStats)
+            .where(VaultStats.id_user == id_user)
+            .values(
+                updated_at=datetime.utcnow(),
+                **{key: getattr(VaultStats, key) + value for key, value in deltas.items()},
+            )
+        )
+        if result.rowcount == 0 or not buckets:
+            return
+
+        stmt = _upsert(session, VaultStatsBucket)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["id_user", "kind", "month"],
+                set_={"entries": VaultStatsBucket.entries + stmt.excluded.entries},
+            ),
+            [
+                {"id_user": id_user, "kind": kind, "month": month, "entries": value}
+                for (kind, month), value in buckets.items()
+            ],
+        )
+        await session.execute(
+            delete(VaultStatsBucket)
+            .where(VaultStatsBucket.id_user == id_user)
+            .where(VaultStatsBucket.entries <= 0)
+        )
+
+    @staticmethod
+    async def _reused_delta(session: AsyncSession, id_user: int, before: list, after: list) -> int:
+        # Повторы считаются по текущим числам записей с каждым затронутым
+        # отпечатком; прежние числа восстанавливаются из снимков
+        removed = Counter(row.password_fingerprint for row in before if row.password_fingerprint)
+        added = Counter(row.password_fingerprint for row in after if row.password_fingerprint)
+        fingerprints = set(removed) | set(added)
+        if not fingerprints:
+            return 0
+        result = await session.execute(
+            select(PasswordEntry.password_fingerprint, func.count())
+            .where(PasswordEntry.id_user == id_user)
+            .where(PasswordEntry.deleted_at.is_(None))
+            .where(PasswordEntry.password_fingerprint.in_(fingerprints))
+            .group_by(PasswordEntry.password_fingerprint)
+        )
+        current = dict(result.all())
+        delta = 0
+        for fingerprint in fingerprints:
+            count = current.get(fingerprint, 0)
+            previous = count - added[fingerprint] + removed[fingerprint]
+            delta += _reused(count) - _reused(previous)
+        return delta
+
+    @staticmethod
+    async def get(session: AsyncSession, id_user: int):
+        stats = await session.get(VaultStats, id_user)
+        if stats is None:
+            return None, []
+        result = await session.execute(
+            select(VaultStatsBucket.kind, VaultStatsBucket.month, VaultStatsBucket.entries)
+            .where(VaultStatsBucket.id_user == id_user)
+            .order_by(VaultStatsBucket.kind, VaultStatsBucket.month)
+        )
+        return stats, result.all()
+
+    @staticmethod
+    async def rebuild(session: AsyncSession, user_ids: list[int] | None = None) -> int:
+        """Полный пересчет агрегатов (всех пользователей, если user_ids не задан).
+        Не фиксирует транзакцию. Возвращает число пересчитанных пользователей."""
+        def scoped(stmt, column):
+            return stmt if user_ids is None else stmt.where(column.in_(user_ids))
+
+        live = PasswordEntry.deleted_at.is_(None)
+        user_ids_found = (
+            await session.execute(scoped(select(User.id_user), User.id_user))
+        ).scalars().all()
+        stats = {
+            id_user: {key: 0 for key in COUNTERS} for id_user in user_ids_found
+        }
+
+        counters = await session.execute(
+            scoped(
+                select(
+                    PasswordEntry.id_user,
+                    func.count(),
+                    func.sum(case((PasswordEntry.weak.is_(True), 1), else_=0)),
+                    func.sum(case((PasswordEntry.breached.is_(True), 1), else_=0)),
+                ).where(live),
+                PasswordEntry.id_user,
+            ).group_by(PasswordEntry.id_user)
+        )
+        for id_user, entries, weak, breached in counters:
+            stats.setdefault(id_user, {key: 0 for key in COUNTERS}).update(
+                entries=entries, weak=weak or 0, breached=breached or 0
+            )
+
+        groups = scoped(
+            select(PasswordEntry.id_user, func.count().label("entries"))
+            .where(live)
+            .where(PasswordEntry.password_fingerprint.is_not(None)),
+            PasswordEntry.id_user,
+        ).group_by(PasswordEntry.id_user, PasswordEntry.password_fingerprint).having(
+            func.count() > 1
+        ).subquery()
+        reused = await session.execute(
+            select(groups.c.id_user, func.sum(groups.c.entries)).group_by(groups.c.id_user)
+        )
+        for id_user, count in reused:
+            stats[id_user]["reused"] = count
+
+        buckets = Counter()
+        rows = await session.stream(
+            scoped(
+                select(PasswordEntry.id_user, PasswordEntry.created_at, CHANGED_AT).where(live),
+                PasswordEntry.id_user,
+            ).execution_options(yield_per=REBUILD_BATCH)
+        )
+        async for id_user, created_at, changed_at in rows:
+            buckets[(id_user, CREATED, month_key(created_at))] += 1
+            buckets[(id_user, CHANGED, month_key(changed_at))] += 1
+
+        # Параллельный пересчет того же пользователя пишет те же значения,
+        # поэтому строки записываются через upsert, а не delete + insert
+        await session.execute(scoped(delete(VaultStatsBucket), VaultStatsBucket.id_user))
+        if stats:
+            stmt = _upsert(session, VaultStats)
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["id_user"],
+                    set_={key: stmt.excluded[key] for key in (*COUNTERS, "updated_at")},
+                ),
+                [{"id_user": id_user, "updated_at": datetime.utcnow(), **values}
+                 for id_user, values in stats.items()],
+            )
+        if buckets:
+            stmt = _upsert(session, VaultStatsBucket)
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["id_user", "kind", "month"],
+                    set_={"entries": stmt.excluded.entries},
+                ),
+                [
+                    {"id_user": id_user, "kind": kind, "month": month, "entries": entries}
+                    for (id_user, kind, month), entries in buckets.items()
+                ],
+            )
+        return len(stats)
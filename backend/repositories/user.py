@@ -1,9 +1,11 @@
 from datetime import datetime
 
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from backend.models import User, RevokedToken
-from backend.security import hash_password
+from backend.cache import auth_cache
+from backend.models import User, RevokedToken, VaultStats
+from backend.hashing import hash_pool
 
 
 class UserRepository:
@@ -16,11 +18,15 @@ class UserRepository:
     async def create_user(
         session: AsyncSession, email: str, password: str, is_admin: bool = False
     ):
-        hashed_password = hash_password(password)
+        hashed_password = await hash_pool.hash(password)
         new_user = User(email=email, password_hash=hashed_password, is_admin=is_admin)
         session.add(new_user)
+        await session.flush()
+        # Пустое хранилище: агрегаты сразу ведутся инкрементально, без пересчета
+        session.add(VaultStats(id_user=new_user.id_user, entries=0, weak=0, reused=0, breached=0))
         await session.commit()
         await session.refresh(new_user)
+        auth_cache.invalidate_user(email)
         return new_user
 
     @staticmethod
@@ -31,14 +37,41 @@ class UserRepository:
 
 class RevokedTokenRepository:
     @staticmethod
-    async def revoke_token(session: AsyncSession, token: str, expires_at: datetime):
-        revoked_token = RevokedToken(token=token, expires_at=expires_at)
+    async def revoke_token(session: AsyncSession, jti: str, expires_at: datetime):
+        if await RevokedTokenRepository.is_token_revoked(session, jti):
+            return
+        revoked_token = RevokedToken(jti=jti, expires_at=expires_at)
         session.add(revoked_token)
         await session.commit()
 
     @staticmethod
-    async def is_token_revoked(session: AsyncSession, token: str):
+    async def is_token_revoked(session: AsyncSession, jti: str):
         result = await session.execute(
-            select(RevokedToken).where(RevokedToken.token == token)
+            select(RevokedToken.jti).where(RevokedToken.jti == jti)
         )
-        return result.scalars().first() is not None
+        return result.scalar() is not None
+
+    @staticmethod
+    async def get_active(session: AsyncSession) -> list[tuple[str, datetime]]:
+        result = await session.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at)
+            .where(RevokedToken.expires_at >= datetime.utcnow())
+        )
+        return result.all()
+
+    @staticmethod
+    async def purge_expired(session: AsyncSession, batch_size: int = 1000) -> int:
+        purged = 0
+        while True:
+            expired = (
+                select(RevokedToken.jti)
+                .where(RevokedToken.expires_at < datetime.utcnow())
+                .limit(batch_size)
+            )
+            result = await session.execute(
+                delete(RevokedToken).where(RevokedToken.jti.in_(expired))
+            )
+            await session.commit()
+            purged += result.rowcount
+            if result.rowcount < batch_size:
+                return purged
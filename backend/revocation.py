@@ -0,0 +1,308 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: общий фильтр недоступен, проверки идут в БД
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Файл общий для воркеров одной машины. При нескольких хостах с общей БД
+# (Postgres) отзыв на другом хосте в этот файл не попадает, и отрицательный
+# ответ фильтра неверен: там фильтр нужно отключить пустым значением
+REVOCATION_FILTER_PATH = os.getenv("REVOCATION_FILTER_PATH", "revocations.bin")
+REVOCATION_FILTER_SLOTS = int(os.getenv("REVOCATION_FILTER_SLOTS", "65536"))
+REVOCATION_BLOOM_BITS = int(os.getenv("REVOCATION_BLOOM_BITS", str(1 << 20)))
+REVOCATION_BLOOM_HASHES = 4
+
+MAGIC = b"RVKF"
+LAYOUT_VERSION = 1
+# magic, layout, seq, generation, count, overflow_until, bloom_bits, slots, flags
+HEADER = struct.Struct("<4sIQQIIQII")
+HEADER_SIZE = 64
+SEQ_OFFSET = 8
+GENERATION_OFFSET = 16
+COUNT_OFFSET = 24
+OVERFLOW_OFFSET = 28
+FLAGS_OFFSET = 44
+# READY: отзывы из БД загружены, отрицательному ответу можно верить.
+# RETIRED: путь уже указывает на файл-замену, этот файл больше не пишется
+FLAG_READY = 1
+FLAG_RETIRED = 2
+READ_RETRIES = 1000
+SLOT = struct.Struct("<16sI")
+# Срок хранится как uint32 секунд; более поздние сроки (например, у записей,
+# перенесенных из старой схемы) обрезаются — запись остается живой до 2106 года
+MAX_EXPIRES_AT = 2**32 - 1
+EMPTY_KEY = bytes(16)
+MAX_LOAD = 0.75
+
+
+def _digest(jti: str) -> bytes:
+    return hashlib.blake2b(jti.encode(), digest_size=16).digest()
+
+
+def _file_size(slots: int, bloom_bits: int) -> int:
+    return HEADER_SIZE + bloom_bits // 8 + slots * SLOT.size
+
+
+def _read_layout(fd: int) -> tuple[int, int, int] | None:
+    # (slots, bloom_bits, flags) или None, если файл не размечен
+    data = os.pread(fd, HEADER.size, 0)
+    if len(data) < HEADER.size:
+        return None
+    magic, layout, _, _, _, _, bloom_bits, slots, flags = HEADER.unpack(data)
+    if (magic, layout) != (MAGIC, LAYOUT_VERSION):
+        return None
+    if os.fstat(fd).st_size != _file_size(slots, bloom_bits):
+        return None
+    return slots, bloom_bits, flags
+
+
+def _init_file(fd: int, slots: int, bloom_bits: int):
+    # Случайное начальное поколение: кэш авторизации сравнивает поколения, и
+    # у файла-замены они не должны совпасть с поколениями прежнего файла
+    generation = int.from_bytes(os.urandom(6), "little")
+    os.ftruncate(fd, _file_size(slots, bloom_bits))
+    os.pwrite(
+        fd,
+        HEADER.pack(MAGIC, LAYOUT_VERSION, 0, generation, 0, 0, bloom_bits, slots, 0),
+        0,
+    )
+
+
+class RevocationFilter:
+    """Bloom-фильтр и точная хэш-таблица отозванных jti в общем mmap-файле.
+
+    Писатели (logout в любом воркере) берут flock и оборачивают изменение в
+    seqlock; читатели не берут блокировок и повторяют чтение, если seq
+    изменился. contains() возвращает None, когда ответ может дать только БД:
+    в том числе пока в новый файл не загружены отзывы из БД (load()).
+
+    Файл, отображенный в память другими воркерами, никогда не усекается:
+    при другой разметке (например, другие REVOCATION_FILTER_* во время
+    выкатки) рядом собирается новый файл и атомарно подменяет путь, а старый
+    помечается RETIRED; воркеры со старым файлом переоткрывают путь при
+    следующем обращении и принимают разметку нового файла.
+
+    Отрицательный ответ авторитетен только в пределах одной машины.
+    """
+
+    def __init__(self, path: str, slots: int, bloom_bits: int):
+        self.path = path
+        self._mm = None
+        self._open(slots, bloom_bits)
+
+    def _open(self, slots: int | None = None, bloom_bits: int | None = None):
+        # Без slots/bloom_bits (переоткрытие после подмены) принимается
+        # разметка файла, иначе файл с другой разметкой заменяется
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            attached = False
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                layout = _read_layout(fd)
+                wanted = (slots or REVOCATION_FILTER_SLOTS, bloom_bits or REVOCATION_BLOOM_BITS)
+                if layout is None and os.fstat(fd).st_size == 0:
+                    # Пустой файл еще никем не отображен, его можно разметить на месте
+                    _init_file(fd, *wanted)
+                    layout = _read_layout(fd)
+                if layout is not None and layout[2] & FLAG_RETIRED:
+                    continue
+                if layout is None or (slots is not None and layout[:2] != wanted):
+                    self._replace(fd, layout, *wanted)
+                    continue
+                self._attach(fd, *layout[:2])
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                attached = True
+                return
+            finally:
+                if not attached:
+                    os.close(fd)
+
+    def _replace(self, fd: int, layout, slots: int, bloom_bits: int):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        tmp_fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            _init_file(tmp_fd, slots, bloom_bits)
+        finally:
+            os.close(tmp_fd)
+        os.replace(tmp_path, self.path)
+        if layout is not None:
+            # Смена поколения заставляет воркеры перепроверить кэш авторизации
+            # и при этом заметить RETIRED
+            generation = struct.unpack("<Q", os.pread(fd, 8, GENERATION_OFFSET))[0]
+            os.pwrite(fd, struct.pack("<I", layout[2] | FLAG_RETIRED), FLAGS_OFFSET)
+            os.pwrite(fd, struct.pack("<Q", generation + 1), GENERATION_OFFSET)
+        logger.warning(
+            "Replaced revocation filter %s with slots=%d bloom_bits=%d", self.path, slots, bloom_bits
+        )
+
+    def _attach(self, fd: int, slots: int, bloom_bits: int):
+        self.slots = slots
+        self.bloom_bits = bloom_bits
+        self._bloom_offset = HEADER_SIZE
+        self._slots_offset = HEADER_SIZE + bloom_bits // 8
+        self._fd = fd
+        self._mm = mmap.mmap(fd, _file_size(slots, bloom_bits))
+
+    def _reopen(self):
+        mm, fd = self._mm, self._fd
+        self._open()
+        mm.close()
+        os.close(fd)
+
+    def _flags(self) -> int:
+        return struct.unpack_from("<I", self._mm, FLAGS_OFFSET)[0]
+
+    @property
+    def generation(self) -> int:
+        if self._flags() & FLAG_RETIRED:
+            self._reopen()
+        return HEADER.unpack_from(self._mm, 0)[3]
+
+    def contains(self, jti: str) -> bool | None:
+        if self._flags() & FLAG_RETIRED:
+            self._reopen()
+        if not self._flags() & FLAG_READY:
+            return None
+        key = _digest(jti)
+        positions = self._bloom_positions(key)
+        for _ in range(READ_RETRIES):
+            seq = struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0]
+            if seq & 1:
+                continue
+            result = self._lookup(key, positions)
+            if struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0] == seq:
+                return result
+        return None
+
+    def add(self, jti: str, expires_at: float):
+        self.add_many([(jti, expires_at)])
+
+    def add_many(self, items: list[tuple[str, float]]):
+        if items:
+            self._write(items, 0)
+
+    def load(self, items: list[tuple[str, float]]):
+        # Все действующие отзывы из БД; только после этого файл помечается READY
+        self._write(items, FLAG_READY)
+
+    def _write(self, items: list[tuple[str, float]], flags: int):
+        while True:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                current = self._flags()
+                if not current & FLAG_RETIRED:
+                    self._begin_write()
+                    now = int(time.time())
+                    for jti, expires_at in items:
+                        if expires_at > now:
+                            self._insert(_digest(jti), min(int(expires_at), MAX_EXPIRES_AT), now)
+                    struct.pack_into("<I", self._mm, FLAGS_OFFSET, current | flags)
+                    self._end_write()
+                    return
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            # Файл заменили, пока ждали блокировку: запись идет в новый
+            self._reopen()
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+    def _bloom_positions(self, key: bytes) -> list[int]:
+        h1, h2 = struct.unpack("<QQ", key)
+        return [(h1 + i * h2) % self.bloom_bits for i in range(REVOCATION_BLOOM_HASHES)]
+
+    def _lookup(self, key: bytes, positions: list[int]) -> bool | None:
+        mm = self._mm
+        offset = self._bloom_offset
+        for position in positions:
+            if not mm[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+
+        now = time.time()
+        index = struct.unpack_from("<Q", key)[0] % self.slots
+        for _ in range(self.slots):
+            slot_key, expires_at = SLOT.unpack_from(mm, self._slots_offset + index * SLOT.size)
+            if slot_key == EMPTY_KEY:
+                break
+            if slot_key == key:
+                return expires_at > now
+            index = (index + 1) % self.slots
+
+        overflow_until = HEADER.unpack_from(mm, 0)[5]
+        return None if overflow_until > now else False
+
+    def _insert(self, key: bytes, expires_at: int, now: int):
+        count = HEADER.unpack_from(self._mm, 0)[4]
+        if count + 1 > self.slots * MAX_LOAD:
+            count = self._compact(now)
+        if count + 1 > self.slots * MAX_LOAD:
+            # Таблица заполнена живыми записями: пока эта запись не истечет,
+            # положительный ответ Bloom-фильтра проверяется в БД
+            overflow_until = max(HEADER.unpack_from(self._mm, 0)[5], expires_at)
+            struct.pack_into("<I", self._mm, OVERFLOW_OFFSET, overflow_until)
+        else:
+            index = struct.unpack_from("<Q", key)[0] % self.slots
+            while True:
+                offset = self._slots_offset + index * SLOT.size
+                slot_key, slot_expires_at = SLOT.unpack_from(self._mm, offset)
+                if slot_key == EMPTY_KEY:
+                    SLOT.pack_into(self._mm, offset, key, expires_at)
+                    struct.pack_into("<I", self._mm, COUNT_OFFSET, count + 1)
+                    break
+                if slot_key == key:
+                    SLOT.pack_into(self._mm, offset, key, max(expires_at, slot_expires_at))
+                    break
+                index = (index + 1) % self.slots
+
+        for position in self._bloom_positions(key):
+            offset = self._bloom_offset + (position >> 3)
+            self._mm[offset] |= 1 << (position & 7)
+
+    def _compact(self, now: int) -> int:
+        live = []
+        for index in range(self.slots):
+            slot_key, expires_at = SLOT.unpack_from(self._mm, self._slots_offset + index * SLOT.size)
+            if slot_key != EMPTY_KEY and expires_at > now:
+                live.append((slot_key, expires_at))
+
+        # Пока действует переполнение, в Bloom-фильтре есть записи, которых нет
+        # в таблице, поэтому его биты сохраняются
+        overflow_until = HEADER.unpack_from(self._mm, 0)[5]
+        start = self._slots_offset if overflow_until > now else self._bloom_offset
+        self._mm[start:] = bytes(len(self._mm) - start)
+        struct.pack_into("<I", self._mm, COUNT_OFFSET, 0)
+        for slot_key, expires_at in live:
+            self._insert(slot_key, expires_at, now)
+        return len(live)
+
+    def _begin_write(self):
+        seq = struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0]
+        struct.pack_into("<Q", self._mm, SEQ_OFFSET, seq + 1)
+
+    def _end_write(self):
+        seq, generation = struct.unpack_from("<QQ", self._mm, SEQ_OFFSET)
+        struct.pack_into("<QQ", self._mm, SEQ_OFFSET, seq + 1, generation + 1)
+
+
+def open_revocation_filter() -> RevocationFilter | None:
+    if fcntl is None or not REVOCATION_FILTER_PATH:
+        return None
+    try:
+        return RevocationFilter(
+            REVOCATION_FILTER_PATH, REVOCATION_FILTER_SLOTS, REVOCATION_BLOOM_BITS
+        )
+    except OSError:
+        logger.exception("Shared revocation filter is unavailable, using the database")
+        return None
+
+
+revocation_filter = open_revocation_filter()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from backend.crypto import vault_cipher
+from backend.db import new_session
+from backend.repositories import KeyRotationRepository, PasswordRepository
+
+logger = logging.getLogger(__name__)
+
+KEY_ROTATION_BATCH_SIZE = int(os.getenv("KEY_ROTATION_BATCH_SIZE", "200"))
+# Ограничение скорости, чтобы ротация не отнимала запись у обычных запросов; 0 — без ограничения
+KEY_ROTATION_ROWS_PER_SECOND = float(os.getenv("KEY_ROTATION_ROWS_PER_SECOND", "500"))
+# Аренда чекпоинта продлевается с каждым пакетом; после падения процесса
+# ротацию подхватывает другой, когда аренда истечет
+KEY_ROTATION_LEASE_SECONDS = int(os.getenv("KEY_ROTATION_LEASE_SECONDS", "300"))
+
+
+async def run_key_rotation(
+    batch_size: int = KEY_ROTATION_BATCH_SIZE,
+    rows_per_second: float = KEY_ROTATION_ROWS_PER_SECOND,
+) -> int:
+    """Перешифровывает хранилище текущим ключом, продолжая с сохраненной позиции.
+
+    Каждый пакет и продвижение чекпоинта фиксируются одной транзакцией, так
+    что прерванная ротация продолжается с места остановки, а записи,
+    измененные параллельно, не перезаписываются (compare-and-set).
+    Ротацию ведет один процесс: он арендует строку чекпоинта и продлевает
+    аренду с каждым пакетом, остальные воркеры и CLI сразу выходят. Записи,
+    которые не удалось расшифровать, пропускаются и считаются в failed.
+    """
+    target_key_id = vault_cipher.current_key_id
+    owner = uuid.uuid4().hex
+    lease = timedelta(seconds=KEY_ROTATION_LEASE_SECONDS)
+    async with new_session() as session:
+        checkpoint = await KeyRotationRepository.claim(session, target_key_id, owner, lease)
+        if checkpoint is None:
+            logger.info("Key rotation to key %d is already running elsewhere", target_key_id)
+            return 0
+        if checkpoint.finished_at is not None:
+            return 0
+
+        after_id = checkpoint.last_id_entry
+        total = 0
+        try:
+            while True:
+                started = time.monotonic()
+                last_id, scanned, rotated, failed = await PasswordRepository.reencrypt_batch(
+                    session, after_id, batch_size
+                )
+                if failed:
+                    logger.warning("Skipped entries that cannot be decrypted: %s", failed)
+                advanced = await KeyRotationRepository.advance(
+                    session, target_key_id, owner, last_id, rotated, len(failed), lease
+                )
+                if not advanced:
+                    logger.warning("Key rotation lease was taken over, stopping")
+                    return total
+                total += rotated
+                if last_id is None:
+                    break
+                after_id = last_id
+                if rows_per_second > 0:
+                    delay = scanned / rows_per_second - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+        except BaseException:
+            await session.rollback()
+            await KeyRotationRepository.release(session, target_key_id, owner)
+            raise
+
+    logger.info("Key rotation to key %d finished, %d entries rewritten", target_key_id, total)
+    return total
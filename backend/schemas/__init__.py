@@ -1,4 +1,4 @@
 from .user import UserCreate, UserResponse, UserLogin, UserProfile, Token
-from .passa import PasswordEntryWithPasswordResponse, PasswordEntryResponse, PasswordEntryCreate
+from .passa import PasswordEntryWithPasswordResponse, PasswordEntryResponse, PasswordEntryCreate, PasswordEntryPage
 
-__all__ = "UserCreate, UserResponse, UserLogin, UserProfile, Token, PasswordEntryWithPasswordResponse, PasswordEntryResponse, PasswordEntryCreate"
+__all__ = "UserCreate, UserResponse, UserLogin, UserProfile, Token, PasswordEntryWithPasswordResponse, PasswordEntryResponse, PasswordEntryCreate, PasswordEntryPage"
@@ -24,5 +24,65 @@ class PasswordEntryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PasswordEntryPage(BaseModel):
+    items: list[PasswordEntryResponse]
+    next_cursor: Optional[str] = None
+
+class PasswordEntryChanges(BaseModel):
+    version: int
+    upserts: list[PasswordEntryResponse]
+    deleted: list[int]
+    cursor: Optional[str] = None
+
+class PasswordImportError(BaseModel):
+    row: int
+    error: str
+
+class PasswordImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: list[PasswordImportError]
+
+class PasswordReuseGroup(BaseModel):
+    entries: list[PasswordEntryResponse]
+
+class PasswordReuseReport(BaseModel):
+    reused_entries: int
+    groups: list[PasswordReuseGroup]
+
+class PasswordBreachReport(BaseModel):
+    breached_entries: int
+    entries: list[PasswordEntryResponse]
+
+class VaultStatsMonth(BaseModel):
+    month: str
+    entries: int
+
+class VaultStatsResponse(BaseModel):
+    entries: int
+    weak: int
+    reused: int
+    breached: int
+    stale: int
+    stale_after_days: int
+    age: list[VaultStatsMonth]
+
 class PasswordEntryWithPasswordResponse(PasswordEntryResponse):
-    password: str
\ No newline at end of file
+    password: str
+
+class PasswordEntryBatchUpdate(PasswordEntryUpdate):
+    id_entry: int
+
+class PasswordBatchRequest(BaseModel):
+    get: list[int] = []
+    update: list[PasswordEntryBatchUpdate] = []
+    delete: list[int] = []
+
+class PasswordBatchResult(BaseModel):
+    id_entry: int
+    action: str
+    status: str
+    entry: Optional[PasswordEntryWithPasswordResponse] = None
+
+class PasswordBatchResponse(BaseModel):
+    results: list[PasswordBatchResult]
\ No newline at end of file
@@ -0,0 +1,101 @@
+import re
+
+from sqlalchemy import Connection, column, func, literal_column, table, text
+
+SEARCH_TABLE = "password_entries_search"
+# Прежняя таблица с id_user UNINDEXED: MATCH и bm25 проходили по записям
+# всех пользователей, и лишь затем отбрасывались чужие
+LEGACY_SEARCH_TABLES = ("password_entries_fts",)
+SEARCH_MIN_TERM = 3
+# Слова не длиннее этого ищутся и с переставленными соседними буквами
+FUZZY_TRANSPOSE_MAX_TERM = 8
+# rowid = id_user << 32 | id_entry: записи пользователя занимают непрерывный
+# диапазон rowid, и FTS5 по ограничению на rowid читает из списков документов
+# только его, так что поиск стоит порядка размера хранилища пользователя
+USER_ROWID_SHIFT = 32
+
+search_table = table(
+    SEARCH_TABLE,
+    column("rowid"),
+    column("website"),
+    column("username"),
+    column("notes"),
+)
+search_match = literal_column(SEARCH_TABLE).op("MATCH")
+search_rank = func.bm25(literal_column(SEARCH_TABLE), 10.0, 5.0, 1.0)
+
+SEARCH_ROWID = f"((:id_user << {USER_ROWID_SHIFT}) | :id_entry)"
+INSERT_SEARCH_ROW = text(
+    f"INSERT INTO {SEARCH_TABLE} (rowid, website, username, notes) "
+    f"VALUES ({SEARCH_ROWID}, :website, :username, :notes)"
+)
+DELETE_SEARCH_ROW = text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {SEARCH_ROWID}")
+
+
+def user_rowid_range(id_user: int) -> tuple[int, int]:
+    first = id_user << USER_ROWID_SHIFT
+    return first, first + (1 << USER_ROWID_SHIFT) - 1
+
+
+def supports_search_index(connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+
+def create_search_index(connection: Connection):
+    if not supports_search_index(connection):
+        return
+    for name in LEGACY_SEARCH_TABLES:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": SEARCH_TABLE},
+    ).first()
+    if exists:
+        return
+    connection.execute(
+        text(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "website, username, notes, tokenize='trigram')"
+        )
+    )
+    connection.execute(
+        text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, website, username, notes) "
+            f"SELECT (id_user << {USER_ROWID_SHIFT}) | id_entry, website, username, notes "
+            "FROM password_entries WHERE deleted_at IS NULL"
+        )
+    )
+
+
+def _transpositions(term: str) -> list[str]:
+    return [
+        term[:i] + term[i + 1] + term[i] + term[i + 2:]
+        for i in range(len(term) - 1)
+        if term[i] != term[i + 1]
+    ]
+
+
+def build_match_queries(query: str) -> tuple[str, str] | None:
+    # Точный запрос: каждое слово как подстрока (trigram-токенизатор).
+    # Нечеткий: триграммы слов через OR, bm25 поднимает записи с большим
+    # числом совпавших триграмм, так что находятся и опечатки. Перестановку
+    # соседних букв в коротком слове («bnak») триграммы не видят — у слова
+    # почти не остается общих триграмм, поэтому такие варианты ищутся целиком
+    terms = [
+        term for term in re.findall(r"\w+", query.lower()) if len(term) >= SEARCH_MIN_TERM
+    ]
+    if not terms:
+        return None
+    grams = dict.fromkeys(
+        term[i:i + SEARCH_MIN_TERM]
+        for term in terms
+        for i in range(len(term) - SEARCH_MIN_TERM + 1)
+    )
+    variants = dict.fromkeys(
+        variant
+        for term in terms if len(term) <= FUZZY_TRANSPOSE_MAX_TERM
+        for variant in _transpositions(term)
+    )
+    exact = " ".join(f'"{term}"' for term in terms)
+    fuzzy = " OR ".join([f'"{variant}"' for variant in variants] + [f'"{gram}"' for gram in grams])
+    return exact, fuzzy
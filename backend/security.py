@@ -1,7 +1,9 @@
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+import hashlib
 import os
+import uuid
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import HTTPException, status
 
@@ -26,10 +28,15 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def token_id(token: str, payload: dict) -> str:
+    # Токены, выпущенные до появления jti, идентифицируются по хэшу
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
 async def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -0,0 +1,18 @@
+import os
+import string
+
+WEAK_PASSWORD_MIN_LENGTH = int(os.getenv("WEAK_PASSWORD_MIN_LENGTH", "10"))
+WEAK_PASSWORD_MIN_CLASSES = int(os.getenv("WEAK_PASSWORD_MIN_CLASSES", "3"))
+
+CHARACTER_CLASSES = (string.ascii_lowercase, string.ascii_uppercase, string.digits)
+
+
+def is_weak_password(password: str) -> bool:
+    # Длинная фраза считается сильной независимо от набора символов
+    if len(password) >= 2 * WEAK_PASSWORD_MIN_LENGTH:
+        return False
+    if len(password) < WEAK_PASSWORD_MIN_LENGTH:
+        return True
+    classes = sum(any(ch in chars for ch in password) for chars in CHARACTER_CLASSES)
+    classes += any(not ch.isascii() or ch in string.punctuation for ch in password)
+    return classes < WEAK_PASSWORD_MIN_CLASSES
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from backend.breach import breach_corpus
+from backend.db import new_session
+from backend.repositories import JobLeaseRepository, PasswordRepository, RevokedTokenRepository
+from backend.rotation import run_key_rotation
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "3600"))
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+REVOKED_TOKEN_SWEEP_INTERVAL_SECONDS = float(
+    os.getenv("REVOKED_TOKEN_SWEEP_INTERVAL_SECONDS", "300")
+)
+REVOKED_TOKEN_SWEEP_BATCH = int(os.getenv("REVOKED_TOKEN_SWEEP_BATCH", "1000"))
+KEY_ROTATION_ON_STARTUP = os.getenv("KEY_ROTATION_ON_STARTUP", "").lower() in ("1", "true", "yes")
+FINGERPRINT_BACKFILL_BATCH = int(os.getenv("FINGERPRINT_BACKFILL_BATCH", "500"))
+FINGERPRINT_BACKFILL_ON_STARTUP = os.getenv(
+    "FINGERPRINT_BACKFILL_ON_STARTUP", "1"
+).lower() in ("1", "true", "yes")
+BREACH_CHECK_BATCH = int(os.getenv("BREACH_CHECK_BATCH", "500"))
+# Аренда прохода по хранилищу, продлевается с каждым пакетом
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+
+async def purge_tombstones():
+    async with new_session() as session:
+        purged = await PasswordRepository.purge_tombstones(
+            session, timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        )
+    if purged:
+        logger.info("Purged %d tombstones", purged)
+
+
+async def purge_revoked_tokens():
+    async with new_session() as session:
+        purged = await RevokedTokenRepository.purge_expired(
+            session, REVOKED_TOKEN_SWEEP_BATCH
+        )
+    if purged:
+        logger.info("Purged %d expired revoked tokens", purged)
+
+
+async def run_leased_batches(name: str, batch) -> int:
+    """Проходит хранилище пакетами batch(session, after_id) -> (последний id,
+    счетчик, id нерасшифровываемых записей); такие записи пропускаются.
+
+    Проход ведет один процесс на все воркеры и CLI: он арендует строку
+    job_leases и продлевает аренду с каждым пакетом, остальные сразу выходят.
+    После падения процесса проход подхватит следующий запуск, когда аренда
+    истечет; обработанные записи он уже не выберет."""
+    owner = uuid.uuid4().hex
+    lease = timedelta(seconds=JOB_LEASE_SECONDS)
+    after_id = 0
+    total = 0
+    async with new_session() as session:
+        if not await JobLeaseRepository.acquire(session, name, owner, lease):
+            logger.info("Job %s is already running elsewhere", name)
+            return 0
+        try:
+            while True:
+                last_id, count, failed = await batch(session, after_id)
+                if failed:
+                    logger.warning("Job %s skipped entries that cannot be decrypted: %s", name, failed)
+                if last_id is None:
+                    break
+                after_id = last_id
+                total += count
+                if not await JobLeaseRepository.renew(session, name, owner, lease):
+                    logger.warning("Job %s lease was taken over, stopping", name)
+                    return total
+        finally:
+            await session.rollback()
+            await JobLeaseRepository.release(session, name, owner)
+    return total
+
+
+async def backfill_fingerprints(
+    batch_size: int = FINGERPRINT_BACKFILL_BATCH, recompute: bool = False
+) -> int:
+    # Записи без отпечатка или признака слабого пароля; recompute — после смены
+    # VAULT_FINGERPRINT_SECRET
+    async def batch(session, after_id):
+        return await PasswordRepository.backfill_fingerprints(
+            session, after_id, batch_size, recompute
+        )
+
+    total = await run_leased_batches("backfill_fingerprints", batch)
+    if total:
+        logger.info("Computed password fingerprints for %d entries", total)
+    return total
+
+
+async def recheck_breaches(batch_size: int = BREACH_CHECK_BATCH, recompute: bool = False) -> int:
+    # Записи без отметки о проверке; recompute — после обновления корпуса
+    async def batch(session, after_id):
+        return await PasswordRepository.recheck_breaches(session, after_id, batch_size, recompute)
+
+    total = await run_leased_batches("recheck_breaches", batch)
+    if total:
+        logger.info("Found %d entries with breached passwords", total)
+    return total
+
+
+async def rotate_keys():
+    try:
+        await run_key_rotation()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Key rotation failed, it will resume from the checkpoint")
+
+
+async def run_once(job):
+    try:
+        await job()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Background job %s failed", job.__name__)
+
+
+async def run_periodically(job, interval: float):
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Background job %s failed", job.__name__)
+        await asyncio.sleep(interval)
+
+
+def start_background_tasks() -> list[asyncio.Task]:
+    tasks = [
+        asyncio.create_task(run_periodically(purge_tombstones, SWEEP_INTERVAL_SECONDS)),
+        asyncio.create_task(
+            run_periodically(purge_revoked_tokens, REVOKED_TOKEN_SWEEP_INTERVAL_SECONDS)
+        ),
+    ]
+    if FINGERPRINT_BACKFILL_ON_STARTUP:
+        tasks.append(asyncio.create_task(run_once(backfill_fingerprints)))
+    if breach_corpus is not None:
+        tasks.append(asyncio.create_task(run_once(recheck_breaches)))
+    if KEY_ROTATION_ON_STARTUP:
+        tasks.append(asyncio.create_task(rotate_keys()))
+    return tasks
+
+
+async def stop_background_tasks(tasks: list[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
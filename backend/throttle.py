@@ -0,0 +1,207 @@
+import importlib
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+from fastapi import HTTPException, status
+
+LOGIN_THROTTLE_WINDOW = float(os.getenv("LOGIN_THROTTLE_WINDOW", "300"))
+LOGIN_THROTTLE_EMAIL_LIMIT = int(os.getenv("LOGIN_THROTTLE_EMAIL_LIMIT", "5"))
+LOGIN_THROTTLE_IP_LIMIT = int(os.getenv("LOGIN_THROTTLE_IP_LIMIT", "20"))
+LOGIN_THROTTLE_BACKOFF = float(os.getenv("LOGIN_THROTTLE_BACKOFF", "30"))
+LOGIN_THROTTLE_MAX_BACKOFF = float(os.getenv("LOGIN_THROTTLE_MAX_BACKOFF", "900"))
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+# "memory" или путь "module:Class" к реализации ThrottleStore с общим хранилищем
+LOGIN_THROTTLE_STORE = os.getenv("LOGIN_THROTTLE_STORE", "memory")
+
+
+class ThrottleState(NamedTuple):
+    window_start: float
+    current: int
+    previous: int
+    blocked_until: float
+    # Число блокировок подряд: каждая следующая вдвое длиннее
+    strikes: int
+
+
+class ThrottleStore(ABC):
+    """Хранилище состояний ограничителя.
+
+    Для нескольких воркеров реализация поверх общего хранилища (Redis,
+    memcached) указывается в LOGIN_THROTTLE_STORE. update() должен быть
+    атомарным: параллельные попытки входа не могут прочитать одно и то же
+    состояние (в Redis — WATCH/MULTI с повтором или Lua-скрипт; func при
+    повторе может вызываться несколько раз).
+    """
+
+    @abstractmethod
+    async def update(
+        self, key: str, func: Callable[[ThrottleState | None], ThrottleState], ttl: float
+    ) -> ThrottleState:
+        """Заменяет состояние ключа на func(текущее) и возвращает новое."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        pass
+
+
+class MemoryThrottleStore(ThrottleStore):
+    def __init__(self, max_keys: int = LOGIN_THROTTLE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._entries: OrderedDict[str, tuple[ThrottleState, float]] = OrderedDict()
+
+    async def update(
+        self, key: str, func: Callable[[ThrottleState | None], ThrottleState], ttl: float
+    ) -> ThrottleState:
+        # Между чтением и записью нет await, так что в пределах цикла событий
+        # изменение атомарно
+        now = time.time()
+        item = self._entries.pop(key, None)
+        state = func(item[0] if item is not None and item[1] > now else None)
+        self._entries[key] = (state, now + ttl)
+        # Случайные адреса не должны раздувать память: вытесняются самые старые
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+        return state
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+def store_from_env() -> ThrottleStore:
+    if LOGIN_THROTTLE_STORE == "memory":
+        return MemoryThrottleStore()
+    module_name, class_name = LOGIN_THROTTLE_STORE.split(":", 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class LoginThrottle:
+    """Ограничитель неудачных входов по email и по IP.
+
+    Число неудач оценивается скользящим окном из двух счетчиков (текущее и
+    предыдущее окно с линейным весом). После превышения лимита ключ
+    блокируется с экспоненциально растущей паузой.
+
+    check() резервирует попытку атомарным изменением состояния: она сразу
+    считается неудачной, а record_success() или release() ее возвращает. Поэтому
+    одновременная серия попыток не проходит проверку раньше, чем будут
+    записаны неудачи первых из них.
+    """
+
+    def __init__(
+        self,
+        store: ThrottleStore,
+        window: float = LOGIN_THROTTLE_WINDOW,
+        email_limit: int = LOGIN_THROTTLE_EMAIL_LIMIT,
+        ip_limit: int = LOGIN_THROTTLE_IP_LIMIT,
+        backoff: float = LOGIN_THROTTLE_BACKOFF,
+        max_backoff: float = LOGIN_THROTTLE_MAX_BACKOFF,
+    ):
+        self.store = store
+        self.window = window
+        self.email_limit = email_limit
+        self.ip_limit = ip_limit
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rejected = 0
+        self.lockouts = 0
+        # Состояние должно пережить и окно, и самую долгую блокировку
+        self._ttl = max(2 * window, max_backoff) + max_backoff
+
+    def _keys(self, email: str, ip: str | None) -> list[tuple[str, int]]:
+        keys = [(f"email:{email.strip().lower()}", self.email_limit)]
+        if ip:
+            keys.append((f"ip:{ip}", self.ip_limit))
+        return keys
+
+    def _roll(self, state: ThrottleState | None, now: float) -> ThrottleState:
+        if state is None:
+            return ThrottleState(now, 0, 0, 0.0, 0)
+        elapsed = now - state.window_start
+        if elapsed < self.window:
+            return state
+        previous = state.current if elapsed < 2 * self.window else 0
+        return state._replace(window_start=now, current=0, previous=previous)
+
+    def _rate(self, state: ThrottleState, now: float) -> float:
+        weight = max(0.0, 1 - (now - state.window_start) / self.window)
+        return state.previous * weight + state.current
+
+    async def check(self, email: str, ip: str | None):
+        if self.email_limit <= 0 and self.ip_limit <= 0:
+            return
+        now = time.time()
+        retry_after = 0.0
+        reserved = []
+        for key, limit in self._keys(email, ip):
+            if limit <= 0:
+                continue
+            allowed, state = await self._reserve(key, limit, now)
+            if allowed:
+                reserved.append((key, limit))
+            else:
+                retry_after = max(retry_after, state.blocked_until - now)
+        if retry_after:
+            # Отклоненная попытка не должна расходовать лимит другого ключа
+            for key, limit in reserved:
+                await self._release(key, limit, now)
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+
+    async def record_success(self, email: str, ip: str | None):
+        await self.store.delete(self._keys(email, None)[0][0])
+        # Счетчик IP не сбрасывается: иначе один свой аккаунт открывал бы
+        # перебор чужих; возвращается только зарезервированная попытка
+        if ip and self.ip_limit > 0:
+            await self._release(f"ip:{ip}", self.ip_limit, time.time())
+
+    async def release(self, email: str, ip: str | None, keep_ip: bool = False):
+        """Возвращает попытку, зарезервированную check(), не засчитывая ее."""
+        now = time.time()
+        for key, limit in self._keys(email, None if keep_ip else ip):
+            if limit > 0:
+                await self._release(key, limit, now)
+
+    async def _reserve(self, key: str, limit: int, now: float) -> tuple[bool, ThrottleState]:
+        allowed = False
+
+        def reserve(state: ThrottleState | None) -> ThrottleState:
+            nonlocal allowed
+            state = self._roll(state, now)
+            allowed = state.blocked_until <= now
+            if not allowed:
+                return state
+            state = state._replace(current=state.current + 1)
+            if self._rate(state, now) >= limit:
+                # Попытка, достигшая лимита, еще проходит, следующие ждут
+                delay = min(self.backoff * 2 ** state.strikes, self.max_backoff)
+                state = state._replace(blocked_until=now + delay, strikes=state.strikes + 1)
+            return state
+
+        state = await self.store.update(key, reserve, self._ttl)
+        if allowed and state.blocked_until > now:
+            self.lockouts += 1
+        return allowed, state
+
+    async def _release(self, key: str, limit: int, now: float):
+        def release(state: ThrottleState | None) -> ThrottleState:
+            state = self._roll(state, now)
+            state = state._replace(current=max(0, state.current - 1))
+            if state.blocked_until > now and self._rate(state, now) < limit:
+                # Блокировку поставила сама возвращаемая попытка
+                state = state._replace(blocked_until=0.0, strikes=max(0, state.strikes - 1))
+            return state
+
+        await self.store.update(key, release, self._ttl)
+
+    def stats(self) -> dict:
+        return {"rejected": self.rejected, "lockouts": self.lockouts}
+
+
+login_throttle = LoginThrottle(store_from_env())
@@ -0,0 +1,57 @@
+# python -m benchmarks.bench_cipher --count 10000 --repeat 5
+import argparse
+import json
+import secrets
+import statistics
+import time
+
+from cryptography.fernet import Fernet
+
+from backend.crypto import LEGACY_FERNET_KEY, vault_cipher
+
+
+def measure(func, items, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = [func(item) for item in items]
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+
+def run(name, encrypt, decrypt, passwords, repeat):
+    tokens, encrypt_time = measure(encrypt, passwords, repeat)
+    _, decrypt_time = measure(decrypt, tokens, repeat)
+    return {
+        "format": name,
+        "encrypt_us_per_item": encrypt_time / len(passwords) * 1e6,
+        "decrypt_us_per_item": decrypt_time / len(passwords) * 1e6,
+        "avg_bytes": sum(map(len, tokens)) / len(tokens),
+    }
+
+
+def main(args):
+    passwords = [secrets.token_urlsafe(args.length)[:args.length] for _ in range(args.count)]
+    fernet = Fernet(LEGACY_FERNET_KEY)
+    results = [
+        run(
+            "fernet",
+            lambda password: fernet.encrypt(password.encode()),
+            lambda token: fernet.decrypt(token).decode(),
+            passwords,
+            args.repeat,
+        ),
+        run("aesgcm-v1", vault_cipher.encrypt, vault_cipher.decrypt, passwords, args.repeat),
+    ]
+    print(json.dumps(
+        {"count": args.count, "password_length": args.length, "repeat": args.repeat, "results": results},
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--length", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
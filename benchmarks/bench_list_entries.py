@@ -0,0 +1,96 @@
+# python -m benchmarks.bench_list_entries --entries 5000 --repeat 20
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from backend.api.passa import entry_rows_to_json
+from backend.models import Base, PasswordEntry, User
+from backend.repositories import PasswordRepository
+from backend.schemas import PasswordEntryResponse
+
+
+async def seed(session_factory, entries: int):
+    async with session_factory() as session:
+        await session.execute(insert(User), [{"email": "bench@example.com", "password_hash": "x"}])
+        ciphertext = PasswordRepository._encrypt_password("correct horse battery staple")
+        await session.execute(
+            insert(PasswordEntry),
+            [
+                {
+                    "id_user": 1,
+                    "website": f"site-{i}.example.com",
+                    "username": f"user{i}",
+                    "encrypted_password": ciphertext,
+                    "notes": "note " * 200,
+                }
+                for i in range(entries)
+            ],
+        )
+        await session.commit()
+
+
+async def orm_path(session, limit):
+    result = await session.execute(
+        select(PasswordEntry)
+        .where(PasswordEntry.id_user == 1)
+        .order_by(PasswordEntry.created_at.desc(), PasswordEntry.id_entry.desc())
+        .limit(limit)
+    )
+    entries = result.scalars().all()
+    return json.dumps(
+        [PasswordEntryResponse.model_validate(e).model_dump(mode="json") for e in entries]
+    )
+
+
+async def projected_path(session, limit):
+    rows = await PasswordRepository.get_user_entries(session, 1, limit)
+    return json.dumps(entry_rows_to_json(rows))
+
+
+async def measure(session_factory, func, limit, repeat):
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        async with session_factory() as session:
+            tracemalloc.start()
+            started = time.perf_counter()
+            await func(session, limit)
+            timings.append(time.perf_counter() - started)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    timings.sort()
+    return {
+        "median_ms": timings[len(timings) // 2] * 1000,
+        "min_ms": timings[0] * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        await seed(session_factory, args.entries)
+
+        report = {"entries": args.entries, "limit": args.limit, "repeat": args.repeat}
+        for name, func in (("orm", orm_path), ("projected", projected_path)):
+            report[name] = await measure(session_factory, func, args.limit, args.repeat)
+        await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
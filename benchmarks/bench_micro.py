@@ -0,0 +1,164 @@
+# python -m benchmarks.bench_micro --output micro.json
+# python -m benchmarks.bench_micro --filter vault --min-time 2
+import argparse
+import json
+import math
+import platform
+import secrets
+import statistics
+import time
+import warnings
+from datetime import datetime
+
+from cryptography.fernet import Fernet
+from jose import jwt
+
+from backend.api.passa import entry_rows_to_json
+from backend.crypto import LEGACY_FERNET_KEY, vault_cipher
+from backend.models import PasswordEntry
+from backend.repositories import PasswordRepository
+from backend.schemas import PasswordEntryResponse
+from backend.security import ALGORITHM, SECRET_KEY, create_access_token, pwd_context
+
+BATCH = 100
+
+
+def calibrate(func, round_time: float) -> int:
+    # Число вызовов в раунде, чтобы раунд длился не меньше round_time:
+    # так погрешность таймера не влияет на быстрые операции
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= round_time or loops >= 1 << 20:
+            return loops
+        loops *= 2
+
+
+def bench(func, batch: int, warmup: float, min_time: float, round_time: float, min_rounds: int) -> dict:
+    deadline = time.perf_counter() + warmup
+    while time.perf_counter() < deadline:
+        func()
+
+    loops = calibrate(func, round_time)
+    per_call = []
+    started = time.perf_counter()
+    while len(per_call) < min_rounds or time.perf_counter() - started < min_time:
+        round_started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - round_started) / loops)
+
+    per_item = sorted(value / batch for value in per_call)
+    mean = statistics.fmean(per_item)
+    stdev = statistics.stdev(per_item) if len(per_item) > 1 else 0.0
+    return {
+        "batch": batch,
+        "rounds": len(per_item),
+        "loops_per_round": loops,
+        "mean_us": round(mean * 1e6, 3),
+        "median_us": round(statistics.median(per_item) * 1e6, 3),
+        "stdev_us": round(stdev * 1e6, 3),
+        # 95% доверительный интервал среднего (нормальное приближение)
+        "ci95_us": round(1.96 * stdev / math.sqrt(len(per_item)) * 1e6, 3),
+        "min_us": round(per_item[0] * 1e6, 3),
+        "p95_us": round(per_item[min(len(per_item) - 1, int(len(per_item) * 0.95))] * 1e6, 3),
+        "ops_per_second": round(1 / mean, 1) if mean else None,
+    }
+
+
+def sample_entry(index: int = 1) -> PasswordEntry:
+    return PasswordEntry(
+        id_entry=index,
+        id_user=1,
+        website=f"site-{index}.example.com",
+        username=f"login{index}",
+        encrypted_password=vault_cipher.encrypt("correct horse battery staple"),
+        notes="note " * 20,
+        created_at=datetime(2024, 1, 1, 12, 0, index % 60),
+    )
+
+
+def build_cases(bcrypt_rounds: list[int]) -> dict:
+    password = "correct horse battery staple"
+    passwords = [secrets.token_urlsafe(12) for _ in range(BATCH)]
+    fernet = Fernet(LEGACY_FERNET_KEY)
+    fernet_token = fernet.encrypt(password.encode())
+    vault_token = vault_cipher.encrypt(password)
+    vault_tokens = [vault_cipher.encrypt(p) for p in passwords]
+    password_hash = pwd_context.hash(password)
+    access_token = create_access_token({"sub": "bench@example.com"})
+    entry = sample_entry()
+    entries = [sample_entry(i) for i in range(BATCH)]
+    rows = [
+        (e.id_entry, e.website, e.username, e.notes, e.created_at) for e in entries
+    ]
+
+    cases = {
+        "bcrypt.hash": (lambda: pwd_context.hash(password), 1),
+        "bcrypt.verify": (lambda: pwd_context.verify(password, password_hash), 1),
+        "fernet.encrypt": (lambda: fernet.encrypt(password.encode()), 1),
+        "fernet.decrypt": (lambda: fernet.decrypt(fernet_token), 1),
+        "vault.encrypt": (lambda: PasswordRepository._encrypt_password(password), 1),
+        "vault.decrypt": (lambda: PasswordRepository._decrypt_password(vault_token), 1),
+        "vault.encrypt_batch": (lambda: PasswordRepository._encrypt_batch(passwords), BATCH),
+        "vault.decrypt_batch": (lambda: PasswordRepository._decrypt_batch(vault_tokens), BATCH),
+        "jwt.encode": (lambda: create_access_token({"sub": "bench@example.com"}), 1),
+        "jwt.decode": (lambda: jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM]), 1),
+        "pydantic.from_orm_dict": (lambda: PasswordEntryResponse.from_orm(entry).dict(), 1),
+        "pydantic.from_orm_dict_batch": (
+            lambda: [PasswordEntryResponse.from_orm(e).dict() for e in entries], BATCH
+        ),
+        "pydantic.model_dump_json_batch": (
+            lambda: [PasswordEntryResponse.model_validate(e).model_dump(mode="json") for e in entries],
+            BATCH,
+        ),
+        "projection.entry_rows_to_json_batch": (lambda: entry_rows_to_json(rows), BATCH),
+    }
+    for rounds in bcrypt_rounds:
+        context = pwd_context.copy(bcrypt__rounds=rounds)
+        cases[f"bcrypt.hash.rounds_{rounds}"] = (lambda c=context: c.hash(password), 1)
+    return cases
+
+
+def main(args):
+    # from_orm/dict устарели в Pydantic 2, но именно их вызывает get_password_entry
+    warnings.simplefilter("ignore", DeprecationWarning)
+    bcrypt_rounds = [int(r) for r in args.bcrypt_rounds.split(",") if r]
+    results = {}
+    for name, (func, batch) in build_cases(bcrypt_rounds).items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = bench(func, batch, args.warmup, args.min_time, args.round_time, args.min_rounds)
+
+    report = {
+        "benchmark": "micro",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "parameters": {
+            "warmup": args.warmup,
+            "min_time": args.min_time,
+            "round_time": args.round_time,
+            "min_rounds": args.min_rounds,
+            "bcrypt_default_rounds": pwd_context.handler("bcrypt").default_rounds,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", help="only run cases whose name contains this substring")
+    parser.add_argument("--warmup", type=float, default=0.2)
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds of measurement per case")
+    parser.add_argument("--round-time", type=float, default=0.01)
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--bcrypt-rounds", default="10,11,12", help="cost factors to compare")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    main(parser.parse_args())
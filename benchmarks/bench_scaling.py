@@ -0,0 +1,217 @@
+# python -m benchmarks.bench_scaling --sizes 1000,100000,1000000 --plot scaling.png
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.models import PasswordEntry, RevokedToken
+from backend.repositories import PasswordRepository, RevokedTokenRepository, UserRepository
+from benchmarks.seed import seed_database, user_email, vault_sizes
+
+LIST_LIMIT = 50
+SEARCH_LIMIT = 20
+
+
+class Scenario:
+    def __init__(self, sizes: list[int], entry_ids: list[int], jtis: list[str], rng: random.Random):
+        self.rng = rng
+        self.largest = max(range(len(sizes)), key=sizes.__getitem__) + 1
+        self.largest_size = max(sizes)
+        # Самое маленькое непустое хранилище: поиск по нему не должен зависеть от общего объема
+        self.smallest = min(
+            (index for index, size in enumerate(sizes) if size), key=sizes.__getitem__
+        ) + 1
+        self.users = len(sizes)
+        self.entry_ids = entry_ids
+        self.jtis = jtis
+
+
+async def op_list_page(session, scenario):
+    await PasswordRepository.get_user_entries(session, scenario.largest, LIST_LIMIT + 1)
+
+
+async def op_list_all(session, scenario):
+    await PasswordRepository.get_user_entries(session, scenario.largest)
+
+
+async def op_detail(session, scenario):
+    entry = await PasswordRepository.get_entry_by_id(
+        session, scenario.rng.choice(scenario.entry_ids), scenario.largest
+    )
+    await PasswordRepository.decrypt_entry_password(entry)
+
+
+async def op_search(session, scenario):
+    rows = await PasswordRepository.search_entries(session, scenario.largest, "bank", SEARCH_LIMIT)
+    assert rows, "search benchmark matched nothing"
+
+
+async def op_search_fuzzy(session, scenario):
+    # Перестановки букв: «bank», «shop»
+    rows = await PasswordRepository.search_entries(
+        session, scenario.largest, "bnak shpo", SEARCH_LIMIT
+    )
+    assert rows, "fuzzy search benchmark matched nothing"
+
+
+async def op_search_small_vault(session, scenario):
+    await PasswordRepository.search_entries(session, scenario.smallest, "bank", SEARCH_LIMIT)
+
+
+async def op_auth_lookup(session, scenario):
+    await UserRepository.get_user_by_email(session, user_email(scenario.rng.randrange(scenario.users)))
+    await RevokedTokenRepository.is_token_revoked(session, scenario.rng.choice(scenario.jtis))
+
+
+async def op_get_all_users(session, scenario):
+    await UserRepository.get_all_users(session)
+
+
+OPERATIONS = {
+    "list_page": op_list_page,
+    "list_all_largest_vault": op_list_all,
+    "detail_decrypt": op_detail,
+    "search": op_search,
+    "search_fuzzy": op_search_fuzzy,
+    "search_small_vault": op_search_small_vault,
+    "auth_lookup": op_auth_lookup,
+    "admin_get_all_users": op_get_all_users,
+}
+
+
+async def measure(session_factory, func, scenario, repeat: int) -> dict:
+    async with session_factory() as session:
+        await func(session, scenario)
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        async with session_factory() as session:
+            tracemalloc.start()
+            started = time.perf_counter()
+            await func(session, scenario)
+            timings.append(time.perf_counter() - started)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    timings.sort()
+    return {
+        "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+async def run_size(size: int, args) -> dict:
+    rng = random.Random(args.seed)
+    users = max(10, size // args.entries_per_user)
+    sizes = vault_sizes(users, size, args.skew, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "scaling.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{database}")
+        started = time.perf_counter()
+        await seed_database(engine, sizes, revoked_tokens=size // 10, seed=args.seed)
+        seed_seconds = time.perf_counter() - started
+
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        largest = max(range(len(sizes)), key=sizes.__getitem__) + 1
+        async with session_factory() as session:
+            entry_ids = (await session.execute(
+                select(PasswordEntry.id_entry).where(PasswordEntry.id_user == largest)
+            )).scalars().all()
+            jtis = (await session.execute(select(RevokedToken.jti).limit(1000))).scalars().all()
+        scenario = Scenario(sizes, list(entry_ids), list(jtis) or ["missing"], rng)
+
+        operations = {}
+        for name, func in OPERATIONS.items():
+            operations[name] = await measure(session_factory, func, scenario, args.repeat)
+        await engine.dispose()
+        return {
+            "entries": size,
+            "users": users,
+            "largest_vault": scenario.largest_size,
+            "seed_seconds": round(seed_seconds, 2),
+            "database_mib": round(os.path.getsize(database) / 2**20, 2),
+            "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "operations": operations,
+        }
+
+
+def scaling_exponents(results: list[dict]) -> dict:
+    # Показатель k в t ~ n^k между соседними размерами: ~0 — константа,
+    # ~1 — линейный рост, больше 1 — хуже линейного
+    exponents = {}
+    for name in OPERATIONS:
+        values = []
+        for small, large in zip(results, results[1:]):
+            t1 = small["operations"][name]["median_ms"]
+            t2 = large["operations"][name]["median_ms"]
+            if t1 > 0 and t2 > 0:
+                values.append(round(math.log(t2 / t1) / math.log(large["entries"] / small["entries"]), 2))
+        exponents[name] = values
+    return exponents
+
+
+def plot(results: list[dict], path: str):
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, skipping the plot", file=sys.stderr)
+        return
+
+    sizes = [result["entries"] for result in results]
+    fig, (latency, memory) = plt.subplots(1, 2, figsize=(12, 5))
+    for name in OPERATIONS:
+        latency.plot(sizes, [r["operations"][name]["median_ms"] for r in results], marker="o", label=name)
+        memory.plot(sizes, [r["operations"][name]["peak_kib"] for r in results], marker="o", label=name)
+    for axis, label in ((latency, "median latency, ms"), (memory, "peak allocations, KiB")):
+        axis.set_xscale("log")
+        axis.set_yscale("log")
+        axis.set_xlabel("entries")
+        axis.set_ylabel(label)
+        axis.grid(True, which="both", alpha=0.3)
+    latency.legend(fontsize="small")
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+async def main(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = [await run_size(size, args) for size in sizes]
+    report = {
+        "benchmark": "scaling",
+        "parameters": {
+            "sizes": sizes,
+            "entries_per_user": args.entries_per_user,
+            "skew": args.skew,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+        "scaling_exponents": scaling_exponents(results),
+    }
+    if args.plot:
+        plot(results, args.plot)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--entries-per-user", type=int, default=100)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--plot", help="save a latency/memory plot (requires matplotlib)")
+    asyncio.run(main(parser.parse_args()))
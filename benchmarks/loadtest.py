@@ -0,0 +1,286 @@
+# python -m benchmarks.loadtest --users 20 --duration 30 --output baseline.json
+# python -m benchmarks.loadtest --compare baseline.json
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# Доли операций в смеси; logout сбрасывает токен, и следующий шаг виртуального
+# пользователя — login
+DEFAULT_MIX = {
+    "profile": 20,
+    "list": 25,
+    "get": 25,
+    "create": 10,
+    "update": 10,
+    "delete": 5,
+    "logout": 2,
+    "login": 3,
+}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Recorder:
+    def __init__(self):
+        self.timings: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.enabled = False
+
+    def record(self, name: str, elapsed: float, ok: bool):
+        if not self.enabled:
+            return
+        self.timings.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, duration: float) -> dict:
+        endpoints = {}
+        for name, values in sorted(self.timings.items()):
+            values.sort()
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors.get(name, 0),
+                "throughput_rps": round(len(values) / duration, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        total = sum(item["requests"] for item in endpoints.values())
+        return {
+            "total_requests": total,
+            "total_errors": sum(self.errors.values()),
+            "throughput_rps": round(total / duration, 2),
+            "endpoints": endpoints,
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, email: str, password: str, rng: random.Random,
+                 recorder: Recorder):
+        self.client = client
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.recorder = recorder
+        self.headers: dict | None = None
+        self.entry_ids: list[int] = []
+
+    async def call(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.recorder.record(name, time.perf_counter() - started, response.is_success)
+        return response
+
+    async def login(self):
+        response = await self.call(
+            "login", "POST", "/auth/login/", json={"email": self.email, "password": self.password}
+        )
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def step(self, operation: str):
+        if self.headers is None or operation == "login":
+            await self.login()
+            return
+        rng = self.rng
+        if operation == "profile":
+            await self.call("profile", "GET", "/auth/profile/", headers=self.headers)
+        elif operation == "list":
+            response = await self.call("list", "GET", "/passwords/", headers=self.headers)
+            if response.is_success:
+                self.entry_ids = [item["id_entry"] for item in response.json()["items"]]
+        elif operation == "get" and self.entry_ids:
+            entry_id = rng.choice(self.entry_ids)
+            await self.call("get", "GET", f"/passwords/{entry_id}/", headers=self.headers)
+        elif operation == "create":
+            response = await self.call(
+                "create", "POST", "/passwords/", headers=self.headers,
+                json={"website": f"load-{rng.randrange(10**6)}.example.com",
+                      "username": "load", "password": "load-secret"},
+            )
+            if response.is_success:
+                self.entry_ids.append(response.json()["id_entry"])
+        elif operation == "update" and self.entry_ids:
+            entry_id = rng.choice(self.entry_ids)
+            await self.call(
+                "update", "PUT", f"/passwords/{entry_id}/", headers=self.headers,
+                json={"notes": f"updated {rng.randrange(10**6)}"},
+            )
+        elif operation == "delete" and self.entry_ids:
+            entry_id = self.entry_ids.pop(rng.randrange(len(self.entry_ids)))
+            await self.call("delete", "DELETE", f"/passwords/{entry_id}/", headers=self.headers)
+        elif operation == "logout":
+            await self.call("logout", "POST", "/auth/logout/", headers=self.headers)
+            self.headers = None
+
+
+async def run_user(user: VirtualUser, mix: dict[str, int], deadline: float):
+    operations, weights = zip(*mix.items())
+    while time.monotonic() < deadline:
+        try:
+            await user.step(user.rng.choices(operations, weights)[0])
+        except httpx.HTTPError:
+            user.headers = None
+
+
+def start_server(database: str, port: int, workdir: str, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+        "REVOCATION_FILTER_PATH": os.path.join(workdir, "revocations.bin"),
+        # Нагрузка идет с одного адреса: ограничение входов исказило бы замеры
+        "LOGIN_THROTTLE_IP_LIMIT": "0",
+        "LOGIN_THROTTLE_EMAIL_LIMIT": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/openapi.json")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    from benchmarks.seed import SEED_PASSWORD, seed_database
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, "loadtest.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{database}")
+        emails = await seed_database(
+            engine, [args.entries_per_user] * args.users, seed=args.seed
+        )
+        await engine.dispose()
+
+        port = free_port()
+        server = start_server(database, port, workdir, args.workers)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            await wait_ready(base_url)
+            recorder = Recorder()
+            limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                users = [
+                    VirtualUser(client, email, SEED_PASSWORD, random.Random(args.seed + i), recorder)
+                    for i, email in enumerate(emails)
+                ]
+                await asyncio.gather(*(user.login() for user in users))
+                # Прогрев: запросы выполняются, но не учитываются
+                await asyncio.gather(
+                    *(run_user(user, DEFAULT_MIX, time.monotonic() + args.warmup) for user in users)
+                )
+                recorder.enabled = True
+                started = time.monotonic()
+                await asyncio.gather(
+                    *(run_user(user, DEFAULT_MIX, started + args.duration) for user in users)
+                )
+                elapsed = time.monotonic() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    return {
+        "benchmark": "loadtest",
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "parameters": {
+            "users": args.users,
+            "entries_per_user": args.entries_per_user,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "workers": args.workers,
+            "seed": args.seed,
+            "mix": DEFAULT_MIX,
+        },
+        **recorder.summary(elapsed),
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    def delta(new, old):
+        return round((new - old) / old * 100, 1) if old else None
+
+    endpoints = {}
+    for name, new in report["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(name)
+        if old:
+            endpoints[name] = {
+                key: delta(new[key], old[key])
+                for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            }
+    return {
+        "baseline_revision": baseline.get("revision"),
+        "throughput_rps_pct": delta(report["throughput_rps"], baseline["throughput_rps"]),
+        "endpoints_pct": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--entries-per-user", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to diff against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
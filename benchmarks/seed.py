@@ -0,0 +1,164 @@
+# python -m benchmarks.seed --database bench.db --users 1000 --entries 100000 --skew 1.1
+import argparse
+import asyncio
+import os
+import random
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from backend.models import Base, PasswordEntry, RevokedToken, User
+from backend.repositories import PasswordRepository, VaultStatsRepository
+from backend.search import create_search_index
+from backend.security import hash_password
+
+SEED_PASSWORD = "bench-password"
+INSERT_CHUNK = 5000
+
+DOMAINS = (
+    "mail", "bank", "shop", "cloud", "news", "forum", "video", "music", "travel", "games",
+    "school", "health", "tax", "crypto", "social", "work", "dev", "photo", "chat", "maps",
+)
+TLDS = ("com", "net", "org", "io", "ru", "de", "co.uk")
+# Доли записей с повторным и слабым паролем: от них зависят отпечатки,
+# агрегаты /passwords/stats/ и выдача /passwords/reused/
+REUSE_RATE = 0.15
+WEAK_RATE = 0.05
+WEAK_PASSWORDS = ("123456", "password", "qwerty123", "iloveyou", "letmein", "111111")
+
+
+def user_email(index: int) -> str:
+    return f"user{index}@bench.example.com"
+
+
+def vault_sizes(users: int, total_entries: int, skew: float, rng: random.Random) -> list[int]:
+    """Распределение записей по пользователям по закону Ципфа: при skew около 1
+    несколько пользователей держат огромные хранилища, большинство — маленькие.
+    skew=0 дает равные хранилища."""
+    if users <= 0:
+        return []
+    weights = [1 / (rank + 1) ** skew for rank in range(users)]
+    total_weight = sum(weights)
+    sizes = [int(total_entries * weight / total_weight) for weight in weights]
+    for index in rng.sample(range(users), total_entries - sum(sizes)):
+        sizes[index] += 1
+    # Самые большие хранилища не обязаны принадлежать первым пользователям
+    rng.shuffle(sizes)
+    return sizes
+
+
+def _entry_password(previous: list[str], rng: random.Random) -> str:
+    roll = rng.random()
+    if previous and roll < REUSE_RATE:
+        return rng.choice(previous)
+    if roll < REUSE_RATE + WEAK_RATE:
+        return rng.choice(WEAK_PASSWORDS)
+    return secrets.token_urlsafe(12)
+
+
+def _entry_row(
+    id_user: int, index: int, created_at: datetime, now: datetime, password: str, rng: random.Random
+) -> dict:
+    site = f"{rng.choice(DOMAINS)}{rng.randrange(1000)}.{rng.choice(TLDS)}"
+    # Отпечаток, слабость и утечка — как при создании записи через API
+    return {
+        "id_user": id_user,
+        "website": site,
+        "username": None if rng.random() < 0.1 else f"login{rng.randrange(10**6)}",
+        "encrypted_password": PasswordRepository._encrypt_password(password),
+        "notes": None if rng.random() < 0.6 else "note " * rng.randrange(1, 60),
+        "created_at": created_at,
+        "password_changed_at": (
+            created_at + (now - created_at) * rng.random() if rng.random() < 0.3 else None
+        ),
+        "row_version": index + 1,
+        **PasswordRepository._password_checks(id_user, password),
+    }
+
+
+async def seed_database(
+    engine: AsyncEngine,
+    sizes: list[int],
+    revoked_tokens: int = 0,
+    password: str = SEED_PASSWORD,
+    seed: int = 1,
+) -> list[str]:
+    """Заполняет пустую схему: sizes[i] — число записей i-го пользователя.
+
+    У всех пользователей один пароль, bcrypt считается один раз; шифртекст у
+    каждой записи свой. Агрегаты статистики пересчитываются в конце.
+    Возвращает email пользователей в порядке sizes.
+    """
+    rng = random.Random(seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    password_hash = hash_password(password)
+    emails = [user_email(i) for i in range(len(sizes))]
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {"email": email, "password_hash": password_hash, "vault_version": size}
+                for email, size in zip(emails, sizes)
+            ],
+        )
+        rows = []
+        for id_user, size in enumerate(sizes, start=1):
+            started = now - timedelta(days=rng.randrange(1, 5 * 365))
+            step = (now - started) / max(size, 1)
+            previous = []
+            for index in range(size):
+                password = _entry_password(previous, rng)
+                previous.append(password)
+                rows.append(_entry_row(id_user, index, started + step * index, now, password, rng))
+                if len(rows) >= INSERT_CHUNK:
+                    await conn.execute(insert(PasswordEntry), rows)
+                    rows = []
+        if rows:
+            await conn.execute(insert(PasswordEntry), rows)
+
+        # Отзывы: в основном уже истекшие (их удаляет фоновая чистка), часть активна
+        for offset in range(0, revoked_tokens, INSERT_CHUNK):
+            await conn.execute(
+                insert(RevokedToken),
+                [
+                    {
+                        "jti": secrets.token_hex(16),
+                        "expires_at": now + timedelta(minutes=rng.randrange(-7 * 24 * 60, 60)),
+                    }
+                    for _ in range(min(INSERT_CHUNK, revoked_tokens - offset))
+                ],
+            )
+        await conn.run_sync(create_search_index)
+
+    async with AsyncSession(engine) as session:
+        await VaultStatsRepository.rebuild(session)
+        await session.commit()
+    return emails
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    sizes = vault_sizes(args.users, args.entries, args.skew, rng)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.abspath(args.database)}")
+    emails = await seed_database(engine, sizes, args.revoked_tokens, seed=args.seed)
+    await engine.dispose()
+    print(
+        f"Seeded {len(emails)} users and {sum(sizes)} entries "
+        f"(largest vault {max(sizes, default=0)}), password {SEED_PASSWORD!r}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", required=True)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--revoked-tokens", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -1,7 +1,16 @@
+from collections import OrderedDict
+
 import requests
 
+# Сколько токенов (сессий) держит кэш списка; вытесняются давно не читавшиеся
+LIST_CACHE_MAX_TOKENS = 16
+DELETE_BATCH_SIZE = 500
+
 
 class PasswordManager:
+    # token -> (ETag первой страницы, полный список); общий для всех страниц UI
+    _list_cache = OrderedDict()
+
     def __init__(self, base_url: str = "http://127.0.0.1:8000/passwords"):
         self.base_url = base_url
         self.session = requests.Session()
@@ -10,15 +19,45 @@ class PasswordManager:
         return {"Authorization": f"Bearer {token}"}
 
     def get_passwords(self, token: str):
+        entries = []
+        params = {"limit": 500}
+        headers = self._get_headers(token)
+        cached = self._list_cache.get(token)
+        if cached:
+            self._list_cache.move_to_end(token)
+            headers["If-None-Match"] = cached[0]
         try:
-            response = self.session.get(
-                f"{self.base_url}/",
-                headers=self._get_headers(token)
-            )
-            return response.json() if response.status_code == 200 else []
+            while True:
+                response = self.session.get(
+                    f"{self.base_url}/",
+                    params=params,
+                    headers=headers
+                )
+                if response.status_code == 304 and cached:
+                    return list(cached[1])
+                if response.status_code != 200:
+                    return []
+                if "cursor" not in params:
+                    etag = response.headers.get("ETag")
+                    headers = self._get_headers(token)
+                page = response.json()
+                entries.extend(page["items"])
+                if not page.get("next_cursor"):
+                    if etag:
+                        self._list_cache[token] = (etag, entries)
+                        self._list_cache.move_to_end(token)
+                        while len(self._list_cache) > LIST_CACHE_MAX_TOKENS:
+                            self._list_cache.popitem(last=False)
+                    return list(entries)
+                params["cursor"] = page["next_cursor"]
         except:
             return []
 
+    @classmethod
+    def forget_token(cls, token: str):
+        # При выходе список с расшифрованными данными не должен оставаться в памяти
+        cls._list_cache.pop(token, None)
+
     def create_password(self, token: str, data: dict):
         try:
             response = self.session.post(
@@ -59,4 +98,35 @@ class PasswordManager:
             )
             return response.status_code == 204
         except:
-            return False
\ No newline at end of file
+            return False
+
+    def get_stats(self, token: str):
+        try:
+            response = self.session.get(
+                f"{self.base_url}/stats/",
+                headers=self._get_headers(token)
+            )
+            return response.json() if response.status_code == 200 else None
+        except:
+            return None
+
+    def delete_passwords(self, token: str, entry_ids: list[int]) -> list[int]:
+        deleted = []
+        try:
+            # Сервер ограничивает размер пакета (BATCH_MAX_ITEMS)
+            for start in range(0, len(entry_ids), DELETE_BATCH_SIZE):
+                response = self.session.post(
+                    f"{self.base_url}/batch/",
+                    json={"delete": entry_ids[start:start + DELETE_BATCH_SIZE]},
+                    headers=self._get_headers(token)
+                )
+                if response.status_code != 200:
+                    break
+                deleted.extend(
+                    result["id_entry"]
+                    for result in response.json()["results"]
+                    if result["status"] == "ok"
+                )
+        except:
+            pass
+        return deleted
@@ -1,5 +1,6 @@
 import flet as ft
 from frontend.api.client import AuthAPI
+from frontend.api.passo import PasswordManager
 from frontend.utils.helpers import validate_email, show_snackbar
 
 
@@ -299,6 +300,31 @@ def dashboard_page(page: ft.Page, auth_api: AuthAPI):
         text_align=ft.TextAlign.CENTER,
     )
 
+    stats_row = ft.Row(wrap=True, alignment=ft.MainAxisAlignment.CENTER, spacing=8)
+    stats = PasswordManager().get_stats(token)
+    if stats:
+        # Красным выделяются ненулевые проблемные показатели
+        for label, key in (
+            ("Записей", "entries"),
+            ("Слабых", "weak"),
+            ("Повторов", "reused"),
+            ("Утекших", "breached"),
+            ("Устаревших", "stale"),
+        ):
+            alert = key != "entries" and stats[key] > 0
+            stats_row.controls.append(
+                ft.Container(
+                    content=ft.Text(
+                        f"{label}: {stats[key]}",
+                        size=14,
+                        color=ft.colors.RED_700 if alert else ft.colors.BLUE_900,
+                    ),
+                    padding=ft.padding.symmetric(horizontal=10, vertical=6),
+                    bgcolor=ft.colors.RED_50 if alert else ft.colors.BLUE_50,
+                    border_radius=12,
+                )
+            )
+
     password_button = ft.ElevatedButton(
         "🔑 Управление паролями",
         icon=ft.icons.LOCK_OUTLINED,
@@ -333,6 +359,7 @@ def dashboard_page(page: ft.Page, auth_api: AuthAPI):
                 ft.Icon(ft.icons.SECURITY_ROUNDED, size=60, color=ft.colors.BLUE_700),
                 welcome_text,
                 description,
+                stats_row,
                 ft.Divider(height=30),
                 password_button,
                 logout_button,
@@ -368,6 +395,7 @@ def dashboard_page(page: ft.Page, auth_api: AuthAPI):
 
 
 def logout_click(page: ft.Page):
+    PasswordManager.forget_token(page.client_storage.get("token"))
     page.client_storage.remove("token")
     page.go("/")
     show_snackbar(page, "Вы успешно вышли из системы", "green")
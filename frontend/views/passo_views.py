@@ -10,6 +10,7 @@ class PasswordListPage:
         self.auth_api = auth_api
         self.pm = PasswordManager()
         self.password_entries = []
+        self.selected_ids = set()
 
         # Стили
         self.list_item_style = {
@@ -24,9 +25,20 @@ class PasswordListPage:
                 ft.Row(
                     controls=[
                         ft.Text("Мои пароли", size=24, weight=ft.FontWeight.BOLD),
-                        ft.IconButton(
-                            icon=ft.icons.REFRESH,
-                            on_click=self.load_passwords
+                        ft.Row(
+                            controls=[
+                                ft.IconButton(
+                                    icon=ft.icons.DELETE_SWEEP_OUTLINED,
+                                    icon_color=ft.colors.RED,
+                                    tooltip="Удалить выбранные",
+                                    on_click=self.delete_selected
+                                ),
+                                ft.IconButton(
+                                    icon=ft.icons.REFRESH,
+                                    on_click=self.load_passwords
+                                )
+                            ],
+                            spacing=5
                         )
                     ],
                     alignment=ft.MainAxisAlignment.SPACE_BETWEEN
@@ -50,6 +62,7 @@ class PasswordListPage:
         try:
             # 🔐 Получаем список паролей от PasswordManager
             self.password_entries = self.pm.get_passwords(token)
+            self.selected_ids.clear()
 
             list_items = []
 
@@ -59,6 +72,12 @@ class PasswordListPage:
                     ft.Container(
                         content=ft.Row(
                             controls=[
+                                # ☑️ Отметка для массового удаления
+                                ft.Checkbox(
+                                    data=entry['id_entry'],
+                                    on_change=self.toggle_selected
+                                ),
+
                                 # 🔒 Иконка "замок"
                                 ft.Icon(ft.icons.LOCK_OUTLINED),
 
@@ -148,6 +167,30 @@ class PasswordListPage:
         except Exception as ex:
             show_snackbar(self.page, f"Ошибка: {str(ex)}", "red")
 
+    def toggle_selected(self, e):
+        if e.control.value:
+            self.selected_ids.add(e.control.data)
+        else:
+            self.selected_ids.discard(e.control.data)
+
+    def delete_selected(self, e):
+        if not self.selected_ids:
+            show_snackbar(self.page, "Не выбрано ни одной записи", "red")
+            return
+        try:
+            # Все отмеченные записи удаляются одним запросом /passwords/batch/
+            requested = sorted(self.selected_ids)
+            deleted = self.pm.delete_passwords(self.page.client_storage.get("token"), requested)
+            if len(deleted) == len(requested):
+                show_snackbar(self.page, f"Удалено записей: {len(deleted)}", "green")
+            else:
+                show_snackbar(
+                    self.page, f"Удалено {len(deleted)} из {len(requested)} записей", "red"
+                )
+            self.load_passwords()
+        except Exception as ex:
+            show_snackbar(self.page, f"Ошибка: {str(ex)}", "red")
+
 
 class AddPasswordPage:
     def __init__(self, page: ft.Page):
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# backend.db создает engine при импорте, поэтому окружение задается до
+# импорта приложения; load_dotenv не перекрывает уже заданные переменные
+_TMP_DIR = tempfile.mkdtemp(prefix="passa-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TMP_DIR}/database.db"
+os.environ["REVOCATION_FILTER_PATH"] = os.path.join(_TMP_DIR, "revocations.bin")
+os.environ["BREACH_CORPUS_PATH"] = ""
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def user(client):
+    # Отдельный пользователь на тест: агрегаты считаются по пользователю
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register/", json={"email": email, "password": "secret"})
+    token = client.post(
+        "/auth/login/", json={"email": email, "password": "secret"}
+    ).json()["access_token"]
+    id_user = client.portal.call(_user_id, email)
+    return id_user, {"Authorization": f"Bearer {token}"}
+
+
+async def _user_id(email: str) -> int:
+    from backend.db import new_session
+    from backend.repositories import UserRepository
+
+    async with new_session() as session:
+        return (await UserRepository.get_user_by_email(session, email)).id_user
+
+
+@pytest.fixture
+def make_undecryptable(client):
+    return lambda entry_id: client.portal.call(_undecryptable, entry_id)
+
+
+async def _undecryptable(entry_id: int):
+    # Шифртекст под ключом 9, которого нет в VAULT_KEYS
+    from cryptography.fernet import Fernet, MultiFernet
+    from sqlalchemy import update
+
+    from backend.crypto import LEGACY_FERNET_KEY, VaultCipher
+    from backend.db import new_session
+    from backend.models import PasswordEntry
+
+    cipher = VaultCipher({9: bytes(32)}, 9, MultiFernet([Fernet(LEGACY_FERNET_KEY)]))
+    async with new_session() as session:
+        await session.execute(
+            update(PasswordEntry)
+            .where(PasswordEntry.id_entry == entry_id)
+            .values(encrypted_password=cipher.encrypt("pw"))
+        )
+        await session.commit()
@@ -0,0 +1,80 @@
+import hashlib
+import uuid
+
+import pytest
+from sqlalchemy import update
+
+from backend import tasks
+from backend.api import passa as passa_api
+from backend.breach import BreachCorpus, build_corpus
+from backend.db import new_session
+from backend.models import PasswordEntry
+from backend.repositories import passa as passa_repository
+
+
+def sha1(password: str) -> str:
+    return hashlib.sha1(password.encode()).hexdigest().upper()
+
+
+def build(tmp_path, passwords: list[str], chunk_records: int = 2) -> BreachCorpus:
+    source = tmp_path / "pwned.txt"
+    # Формат HIBP, без сортировки и с повторами; маленькие части проверяют слияние
+    source.write_text("".join(f"{sha1(password)}:{count}\n" for count, password in enumerate(passwords)))
+    output = str(tmp_path / "corpus.bin")
+    build_corpus(str(source), output, chunk_records)
+    return BreachCorpus(output)
+
+
+def test_corpus_lookup(tmp_path):
+    leaked = ["password", "123456", "qwerty", "letmein", "123456"]
+    corpus = build(tmp_path, leaked)
+    assert corpus.count == 4
+    assert all(corpus.contains(password) for password in leaked)
+    assert not corpus.contains("Str0ng-Passw0rd!")
+    assert not corpus.contains("")
+
+
+def test_corpus_rejects_bad_input(tmp_path):
+    source = tmp_path / "pwned.txt"
+    source.write_text(f"{sha1('a')}:1\nnot-a-hash:2\n")
+    with pytest.raises(ValueError, match="Line 2"):
+        build_corpus(str(source), str(tmp_path / "corpus.bin"))
+
+    corpus = build(tmp_path, ["a", "b"])
+    corpus.close()
+    with open(corpus.path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 1)
+    with pytest.raises(ValueError, match="truncated"):
+        BreachCorpus(corpus.path)
+
+
+async def _forget_breach_checks(id_user: int):
+    async with new_session() as session:
+        await session.execute(
+            update(PasswordEntry).where(PasswordEntry.id_user == id_user).values(breached=None)
+        )
+        await session.commit()
+
+
+def test_recheck_skips_undecryptable_entries(
+    client, user, make_undecryptable, tmp_path, monkeypatch, caplog
+):
+    id_user, headers = user
+    leaked = f"leaked-{uuid.uuid4().hex}"
+    orphan, breached, _ = [
+        client.post(
+            "/passwords/", json={"website": site, "password": password}, headers=headers
+        ).json()["id_entry"]
+        for site, password in (("a", "pw"), ("b", leaked), ("c", "Str0ng-Passw0rd!"))
+    ]
+    make_undecryptable(orphan)
+    client.portal.call(_forget_breach_checks, id_user)
+    corpus = build(tmp_path, [leaked])
+    monkeypatch.setattr(passa_repository, "breach_corpus", corpus)
+    monkeypatch.setattr(passa_api, "breach_corpus", corpus)
+
+    assert client.portal.call(tasks.recheck_breaches, 1) == 1
+    assert f"[{orphan}]" in caplog.text
+    report = client.get("/passwords/health/breached/", headers=headers).json()
+    assert [entry["id_entry"] for entry in report["entries"]] == [breached]
+    assert client.get("/passwords/stats/", headers=headers).json()["breached"] == 1
@@ -0,0 +1,113 @@
+import base64
+
+import pytest
+from cryptography.fernet import Fernet, MultiFernet
+
+from backend import crypto
+from backend.crypto import (
+    ENVELOPE_VERSION,
+    LEGACY_FERNET_KEY,
+    DecryptionError,
+    VaultCipher,
+    VaultConfigError,
+    cipher_from_env,
+    derive_key,
+    parse_keys,
+    password_fingerprint,
+)
+
+KEY = base64.urlsafe_b64encode(bytes(32)).decode()
+OLD_FERNET_KEY = Fernet.generate_key()
+LEGACY = MultiFernet([Fernet(LEGACY_FERNET_KEY), Fernet(OLD_FERNET_KEY)])
+
+
+def make_cipher(current_key_id: int = 2) -> VaultCipher:
+    return VaultCipher({1: bytes(32), 2: bytes(range(32))}, current_key_id, LEGACY)
+
+
+def test_parse_keys():
+    assert parse_keys(f" 1:{KEY}, 255:{KEY} ,") == {1: bytes(32), 255: bytes(32)}
+
+
+@pytest.mark.parametrize(
+    "value, message",
+    [
+        (KEY, "must look like"),
+        (f"one:{KEY}", "non-numeric"),
+        (f"256:{KEY}", "between 0 and 255"),
+        (f"-1:{KEY}", "between 0 and 255"),
+        (f"1:{KEY},1:{KEY}", "more than once"),
+        ("1:not-base64!", "not valid base64"),
+        ("1:" + base64.urlsafe_b64encode(bytes(16)).decode(), "32 bytes"),
+    ],
+)
+def test_parse_keys_rejects_bad_config(value, message):
+    with pytest.raises(VaultConfigError, match=message):
+        parse_keys(value)
+
+
+def test_envelope_round_trip():
+    cipher = make_cipher()
+    blob = cipher.encrypt("пароль")
+    assert blob[:2] == bytes([ENVELOPE_VERSION, 2])
+    assert cipher.decrypt(blob) == "пароль"
+    # Случайный nonce: одинаковые пароли дают разные шифртексты
+    assert cipher.encrypt("пароль") != blob
+    assert not cipher.needs_upgrade(blob)
+
+
+def test_legacy_and_rotated_blobs_are_readable_and_need_upgrade():
+    cipher = make_cipher()
+    for blob in (
+        Fernet(LEGACY_FERNET_KEY).encrypt(b"old"),
+        Fernet(OLD_FERNET_KEY).encrypt(b"old"),
+        make_cipher(current_key_id=1).encrypt("old"),
+    ):
+        assert cipher.decrypt(blob) == "old"
+        assert cipher.needs_upgrade(blob)
+        upgraded = cipher.encrypt(cipher.decrypt(blob))
+        assert cipher.key_id(upgraded) == 2 and not cipher.needs_upgrade(upgraded)
+
+
+def test_decrypt_errors():
+    cipher = make_cipher()
+    blob = cipher.encrypt("secret")
+    with pytest.raises(DecryptionError, match="Unknown vault key id 9"):
+        cipher.decrypt(blob[:1] + bytes([9]) + blob[2:])
+    # id ключа входит в связанные данные: подмена заголовка не проходит
+    with pytest.raises(DecryptionError, match="authentication failed"):
+        cipher.decrypt(blob[:1] + bytes([1]) + blob[2:])
+    with pytest.raises(DecryptionError, match="authentication failed"):
+        cipher.decrypt(blob[:-1] + bytes([blob[-1] ^ 1]))
+    with pytest.raises(DecryptionError, match="legacy"):
+        cipher.decrypt(Fernet.generate_key())
+
+
+def test_cipher_from_env_falls_back_to_legacy_key(monkeypatch):
+    monkeypatch.delenv("VAULT_KEYS", raising=False)
+    monkeypatch.delenv("VAULT_CURRENT_KEY_ID", raising=False)
+    monkeypatch.setattr(crypto, "LEGACY_FERNET_KEYS", f"{LEGACY_FERNET_KEY}, {OLD_FERNET_KEY.decode()}")
+    cipher = cipher_from_env()
+    assert cipher.current_key_id == 1
+    derived = VaultCipher({1: derive_key(LEGACY_FERNET_KEY, 1)}, 1, LEGACY)
+    assert cipher.decrypt(derived.encrypt("x")) == "x"
+    assert cipher.decrypt(Fernet(OLD_FERNET_KEY).encrypt(b"y")) == "y"
+
+
+def test_cipher_from_env_picks_current_key(monkeypatch):
+    monkeypatch.setenv("VAULT_KEYS", f"1:{KEY},7:{KEY}")
+    monkeypatch.delenv("VAULT_CURRENT_KEY_ID", raising=False)
+    assert cipher_from_env().current_key_id == 7
+    monkeypatch.setenv("VAULT_CURRENT_KEY_ID", "1")
+    assert cipher_from_env().current_key_id == 1
+    monkeypatch.setenv("VAULT_CURRENT_KEY_ID", "3")
+    with pytest.raises(VaultConfigError, match="Unknown current vault key id 3"):
+        cipher_from_env()
+    monkeypatch.setenv("VAULT_CURRENT_KEY_ID", "x")
+    with pytest.raises(VaultConfigError, match="must be an integer"):
+        cipher_from_env()
+
+
+def test_fingerprint_is_per_user():
+    assert password_fingerprint(1, "same") == password_fingerprint(1, "same")
+    assert password_fingerprint(1, "same") != password_fingerprint(2, "same")
@@ -0,0 +1,44 @@
+import uuid
+
+from backend.api.passa import vault_etag
+
+
+def register(client) -> dict:
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register/", json={"email": email, "password": "secret"})
+    token = client.post(
+        "/auth/login/", json={"email": email, "password": "secret"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_entry_etag_checks_ownership_first(client, user):
+    _, headers = user
+    entry_id = client.post(
+        "/passwords/", json={"website": "a", "password": "pw"}, headers=headers
+    ).json()["id_entry"]
+    etag = client.get(f"/passwords/{entry_id}/", headers=headers).headers["ETag"]
+    assert client.get(
+        f"/passwords/{entry_id}/", headers={**headers, "If-None-Match": etag}
+    ).status_code == 304
+
+    # Чужая запись: тот же id и совпадающий ETag не раскрывают ее существование
+    other = register(client)
+    assert client.get(
+        f"/passwords/{entry_id}/", headers={**other, "If-None-Match": "*"}
+    ).status_code == 404
+
+    client.delete(f"/passwords/{entry_id}/", headers=headers)
+    version = client.get("/passwords/", headers=headers).headers["ETag"].split('"')[1].split("-")[0]
+    for tag in ("*", vault_etag(version, "entry", entry_id)):
+        assert client.get(
+            f"/passwords/{entry_id}/", headers={**headers, "If-None-Match": tag}
+        ).status_code == 404
+
+
+def test_list_etag_rejects_bad_cursor(client, user):
+    _, headers = user
+    assert client.get("/passwords/?cursor=junk", headers=headers).status_code == 400
+    assert client.get(
+        "/passwords/?cursor=junk", headers={**headers, "If-None-Match": "*"}
+    ).status_code == 400
@@ -0,0 +1,99 @@
+import json
+import uuid
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+CSV = {"Content-Type": "text/csv"}
+
+
+def export(client, headers) -> list[dict]:
+    response = client.get("/passwords/export/", headers=headers)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson_import_reports_rows_with_errors(client, user):
+    _, headers = user
+    body = "\n".join([
+        '{"website": "a.example", "password": "pw", "username": "me"}',
+        "{not json",
+        "",
+        '["array"]',
+        '{"password": "no website"}',
+        '{"website": "b.example", "password": "pw", "notes": "Заметка"}',
+    ])
+    report = client.post("/passwords/import/", content=body.encode(), headers={**headers, **NDJSON}).json()
+    assert report["imported"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][1]["error"] == "Expected a JSON object"
+    assert "website" in report["errors"][2]["error"]
+    assert [item["website"] for item in export(client, headers)] == ["a.example", "b.example"]
+
+
+def test_csv_import_handles_quotes_and_bad_rows(client, user):
+    _, headers = user
+    body = (
+        "﻿Website,Username,Password,Notes\r\n"
+        'a.example,me,pw,"line one\r\nline two, with comma"\r\n'
+        "b.example,me\r\n"
+        "c.example,,pw,\r\n"
+        'd.example,me,pw,"unterminated\r\n'
+    )
+    report = client.post("/passwords/import/", content=body.encode(), headers={**headers, **CSV}).json()
+    assert report["imported"] == 2
+    assert report["errors"] == [
+        {"row": 2, "error": "Expected 4 columns, got 2"},
+        {"row": 4, "error": "Unterminated quoted field"},
+    ]
+    exported = export(client, headers)
+    assert exported[0]["notes"] == "line one\nline two, with comma"
+    assert exported[1]["username"] is None
+
+
+def test_import_rejects_unknown_content_type(client, user):
+    _, headers = user
+    response = client.post("/passwords/import/", content=b"x", headers={**headers, "Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_export_round_trip(client, user):
+    _, headers = user
+    for index in range(3):
+        client.post(
+            "/passwords/",
+            json={"website": f"site{index}", "password": f"pw{index}", "notes": "n"},
+            headers=headers,
+        )
+    exported = export(client, headers)
+    assert [(item["website"], item["password"]) for item in exported] == [
+        ("site0", "pw0"), ("site1", "pw1"), ("site2", "pw2")
+    ]
+
+    body = "".join(json.dumps(item) + "\n" for item in exported)
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register/", json={"email": email, "password": "secret"})
+    token = client.post("/auth/login/", json={"email": email, "password": "secret"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+    report = client.post("/passwords/import/", content=body, headers={**other, **NDJSON}).json()
+    assert report == {"imported": 3, "failed": 0, "errors": []}
+
+    # created_at при импорте не переносится
+    def without_created_at(items):
+        return [{key: value for key, value in item.items() if key != "created_at"} for item in items]
+
+    assert without_created_at(export(client, other)) == without_created_at(exported)
+
+
+def test_export_marks_undecryptable_entries(client, user, make_undecryptable):
+    _, headers = user
+    ids = [
+        client.post(
+            "/passwords/", json={"website": site, "password": "pw"}, headers=headers
+        ).json()["id_entry"]
+        for site in ("a", "b", "c")
+    ]
+    make_undecryptable(ids[1])
+
+    exported = export(client, headers)
+    assert len(exported) == 3
+    assert exported[1] == {"id_entry": ids[1], "website": "b", "error": "undecryptable"}
+    assert [item.get("password") for item in exported] == ["pw", None, "pw"]
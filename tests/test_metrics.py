@@ -0,0 +1,26 @@
+from backend.api import metrics as metrics_api
+from backend.db import new_session
+from backend.repositories import UserRepository
+
+
+async def _create_admin(email: str):
+    async with new_session() as session:
+        await UserRepository.create_user(session, email=email, password="secret", is_admin=True)
+
+
+def test_metrics_require_admin_or_token(client, user, monkeypatch):
+    _, headers = user
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer junk"}).status_code == 401
+    assert client.get("/metrics", headers=headers).status_code == 403
+
+    client.portal.call(_create_admin, "metrics-admin@example.com")
+    token = client.post(
+        "/auth/login/", json={"email": "metrics-admin@example.com", "password": "secret"}
+    ).json()["access_token"]
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+    monkeypatch.setattr(metrics_api, "METRICS_TOKEN", "scrape-token")
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).status_code == 200
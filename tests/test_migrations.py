@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+from jose import jwt
+from passlib.hash import bcrypt
+
+ROOT = Path(__file__).resolve().parents[1]
+LEGACY_FERNET_KEY = "W9Er9gRuwAQRM4AtdBX5cQ_5Z-3XZ3bwM5SZ3yH0z2Q="
+SECRET_KEY = "migration-test-secret"
+# Токен первого релиза (без jti), отозванный до обновления
+REVOKED_TOKEN = jwt.encode({"sub": "old@example.com", "exp": 32503680000}, SECRET_KEY, "HS256")
+
+# Схема первого релиза: ее создавал create_all по исходным моделям
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id_user INTEGER NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    password_hash VARCHAR NOT NULL,
+    is_admin BOOLEAN NOT NULL,
+    PRIMARY KEY (id_user),
+    UNIQUE (email)
+);
+CREATE TABLE revoked_tokens (
+    id INTEGER NOT NULL,
+    token VARCHAR(255) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_revoked_tokens_token ON revoked_tokens (token);
+CREATE TABLE password_entries (
+    id_entry INTEGER NOT NULL,
+    id_user INTEGER NOT NULL,
+    website VARCHAR(255) NOT NULL,
+    username VARCHAR(255) NOT NULL,
+    encrypted_password BLOB NOT NULL,
+    notes TEXT NOT NULL,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (id_entry),
+    FOREIGN KEY(id_user) REFERENCES users (id_user)
+);
+"""
+
+# Запускается в отдельном процессе: engine создается при импорте backend.db
+# по DATABASE_URL из окружения
+APP_SCRIPT = """
+import json
+import os
+from fastapi.testclient import TestClient
+from backend.main import app
+
+with TestClient(app) as client:
+    token = client.post(
+        "/auth/login/", json={"email": "old@example.com", "password": "secret"}
+    ).json()["access_token"]
+    headers = {"Authorization": "Bearer " + token}
+    revoked = client.get(
+        "/passwords/", headers={"Authorization": "Bearer " + os.environ["REVOKED_TOKEN"]}
+    )
+    listed = client.get("/passwords/", headers=headers)
+    changes = client.get("/passwords/changes/?since=0", headers=headers).json()
+    legacy = client.get("/passwords/7/", headers=headers)
+    imported = client.post(
+        "/passwords/import/",
+        content='{"website": "new.example", "password": "pw"}\\n',
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    stats = client.get("/passwords/stats/", headers=headers)
+    logout = client.post("/auth/logout/", headers=headers)
+    after_logout = client.get("/passwords/", headers=headers)
+    print(json.dumps({
+        "revoked": revoked.status_code,
+        "listed": [item["website"] for item in listed.json()["items"]],
+        "changes": [item["website"] for item in changes["upserts"]],
+        "version": changes["version"],
+        "legacy": legacy.json().get("password"),
+        "imported": imported.json(),
+        "stats_entries": stats.json().get("entries"),
+        "logout": logout.status_code,
+        "after_logout": after_logout.status_code,
+    }))
+"""
+
+
+def create_baseline_database(path: Path):
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.execute(
+        "INSERT INTO users VALUES (1, 'old@example.com', ?, 0)", (bcrypt.hash("secret"),)
+    )
+    connection.execute(
+        "INSERT INTO password_entries VALUES (7, 1, 'legacy.example', 'me', ?, '', "
+        "'2020-01-01 00:00:00')",
+        (Fernet(LEGACY_FERNET_KEY).encrypt(b"legacy-password"),),
+    )
+    connection.execute(
+        "INSERT INTO revoked_tokens VALUES (1, ?, '2999-01-01 00:00:00')", (REVOKED_TOKEN,)
+    )
+    connection.commit()
+    connection.close()
+
+
+def run_app(tmp_path: Path) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'database.db'}",
+        "REVOCATION_FILTER_PATH": str(tmp_path / "revocations.bin"),
+        "BREACH_CORPUS_PATH": "",
+        "SECRET_KEY": SECRET_KEY,
+        "REVOKED_TOKEN": REVOKED_TOKEN,
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", APP_SCRIPT],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_startup_upgrades_baseline_database(tmp_path):
+    create_baseline_database(tmp_path / "database.db")
+
+    result = run_app(tmp_path)
+    assert result["revoked"] == 401
+    assert result["listed"] == ["legacy.example"]
+    # Полная синхронизация видит записи, созданные до обновления
+    assert result["changes"] == ["legacy.example"]
+    assert result["version"] == 1
+    assert result["legacy"] == "legacy-password"
+    assert result["imported"] == {"imported": 1, "failed": 0, "errors": []}
+    assert result["stats_entries"] == 2
+    assert result["logout"] == 200
+    assert result["after_logout"] == 401
+
+    # Повторный запуск по уже обновленной схеме ничего не меняет
+    result = run_app(tmp_path)
+    assert result["revoked"] == 401
+    assert result["listed"] == ["new.example", "legacy.example"]
+    assert sorted(result["changes"]) == ["legacy.example", "new.example"]
+
+    connection = sqlite3.connect(tmp_path / "database.db")
+    columns = {row[1]: row for row in connection.execute("PRAGMA table_info(password_entries)")}
+    assert {"updated_at", "deleted_at", "row_version", "password_fingerprint", "breached",
+            "weak", "password_changed_at"} <= set(columns)
+    assert columns["username"][3] == 0 and columns["notes"][3] == 0
+    assert "jti" in {row[1] for row in connection.execute("PRAGMA table_info(revoked_tokens)")}
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import update
+
+from backend.db import new_session
+from backend.models import PasswordEntry
+
+
+async def _same_created_at(id_user: int):
+    # Одинаковое время создания: порядок держится на id_entry
+    async with new_session() as session:
+        await session.execute(
+            update(PasswordEntry)
+            .where(PasswordEntry.id_user == id_user)
+            .values(created_at=datetime(2024, 1, 1))
+        )
+        await session.commit()
+
+
+def pages(client, headers, limit: int) -> list[list[int]]:
+    result, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/passwords/", params=params, headers=headers).json()
+        result.append([item["id_entry"] for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return result
+
+
+def test_keyset_pages_cover_every_entry_once(client, user):
+    id_user, headers = user
+    ids = [
+        client.post(
+            "/passwords/", json={"website": f"site{index}", "password": "pw"}, headers=headers
+        ).json()["id_entry"]
+        for index in range(7)
+    ]
+    assert pages(client, headers, 3) == [ids[:3:-1], ids[3:0:-1], ids[:1]]
+
+    client.portal.call(_same_created_at, id_user)
+    assert sum(pages(client, headers, 2), []) == ids[::-1]
+
+
+def test_insert_between_pages_does_not_shift_the_next_page(client, user):
+    _, headers = user
+    ids = [
+        client.post(
+            "/passwords/", json={"website": f"site{index}", "password": "pw"}, headers=headers
+        ).json()["id_entry"]
+        for index in range(4)
+    ]
+    first = client.get("/passwords/", params={"limit": 2}, headers=headers).json()
+    client.post("/passwords/", json={"website": "new", "password": "pw"}, headers=headers)
+    second = client.get(
+        "/passwords/", params={"limit": 2, "cursor": first["next_cursor"]}, headers=headers
+    ).json()
+    assert [item["id_entry"] for item in second["items"]] == ids[1::-1]
+    assert second["next_cursor"] is None
+
+
+def test_list_etag_changes_with_the_vault(client, user):
+    _, headers = user
+    etag = client.get("/passwords/", headers=headers).headers["ETag"]
+    assert client.get("/passwords/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.post("/passwords/", json={"website": "a", "password": "pw"}, headers=headers)
+    response = client.get("/passwords/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
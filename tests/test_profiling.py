@@ -0,0 +1,24 @@
+import os
+
+from backend import profiling
+from backend.profiling import ProfilerMiddleware
+
+
+def test_prune_keeps_newest_profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 3)
+    monkeypatch.setattr(profiling, "PROFILE_MAX_BYTES", 250)
+    for index in range(5):
+        path = tmp_path / f"{index}.collapsed"
+        path.write_text("x" * 100)
+        os.utime(path, (index, index))
+
+    profiling.prune_profiles()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["3.collapsed", "4.collapsed"]
+
+
+def test_profile_header_requires_admin(client, user):
+    _, headers = user
+    assert not client.portal.call(ProfilerMiddleware._is_admin, "")
+    assert not client.portal.call(ProfilerMiddleware._is_admin, "Bearer junk")
+    assert not client.portal.call(ProfilerMiddleware._is_admin, headers["Authorization"])
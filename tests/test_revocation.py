@@ -0,0 +1,67 @@
+import time
+
+from backend.revocation import RevocationFilter
+
+SLOTS = 64
+BLOOM_BITS = 1024
+
+
+def open_filter(path, slots: int = SLOTS) -> RevocationFilter:
+    return RevocationFilter(str(path / "revocations.bin"), slots, BLOOM_BITS)
+
+
+def test_answers_only_after_load(tmp_path):
+    revocations = open_filter(tmp_path)
+    # Пока отзывы из БД не загружены, отрицательный ответ не окончателен
+    assert revocations.contains("a") is None
+
+    later = time.time() + 60
+    revocations.load([("a", later), ("expired", time.time() - 1)])
+    assert revocations.contains("a") is True
+    assert revocations.contains("expired") is False
+    assert revocations.contains("b") is False
+
+
+def test_writes_are_shared_between_workers(tmp_path):
+    first, second = open_filter(tmp_path), open_filter(tmp_path)
+    first.load([])
+    generation = second.generation
+
+    first.add("a", time.time() + 60)
+    assert second.contains("a") is True
+    assert second.generation > generation
+
+
+def test_far_future_expiry_is_clamped(tmp_path):
+    # Срок в 2999 году не помещается в uint32 слота
+    revocations = open_filter(tmp_path)
+    revocations.load([("legacy", 32503680000)])
+    assert revocations.contains("legacy") is True
+
+
+def test_reader_retries_while_write_is_in_progress(tmp_path):
+    revocations = open_filter(tmp_path)
+    revocations.load([("a", time.time() + 60)])
+
+    revocations._begin_write()
+    # Нечетный seq: запись не завершена, читатель не доверяет снимку
+    assert revocations.contains("a") is None
+    revocations._end_write()
+    assert revocations.contains("a") is True
+
+
+def test_layout_change_retires_the_old_file(tmp_path):
+    old = open_filter(tmp_path)
+    old.load([("a", time.time() + 60)])
+    generation = old.generation
+
+    # Выкатка с другой разметкой: новый файл подменяет путь, старый помечается RETIRED
+    new = open_filter(tmp_path, slots=SLOTS * 2)
+    assert old.generation != generation
+    assert old.slots == SLOTS * 2
+    assert old.contains("a") is None
+
+    new.load([("a", time.time() + 60)])
+    assert old.contains("a") is True
+    old.add("b", time.time() + 60)
+    assert new.contains("b") is True
@@ -0,0 +1,70 @@
+import uuid
+
+from backend.search import build_match_queries
+
+
+def register(client) -> dict:
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register/", json={"email": email, "password": "secret"})
+    token = client.post(
+        "/auth/login/", json={"email": email, "password": "secret"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def search(client, headers, query: str) -> list[str]:
+    response = client.get("/passwords/search/", params={"q": query}, headers=headers)
+    assert response.status_code == 200
+    return [item["website"] for item in response.json()]
+
+
+def create(client, headers, website: str, **fields) -> int:
+    return client.post(
+        "/passwords/", json={"website": website, "password": "pw", **fields}, headers=headers
+    ).json()["id_entry"]
+
+
+def test_fuzzy_query_includes_transpositions():
+    exact, fuzzy = build_match_queries("Bnak")
+    assert exact == '"bnak"'
+    assert '"bank"' in fuzzy.split(" OR ")
+    assert build_match_queries("ab") is None
+
+
+def test_search_is_scoped_to_the_owner(client, user):
+    _, headers = user
+    other = register(client)
+    create(client, headers, "mybank.example", username="alice")
+    create(client, other, "otherbank.example")
+
+    assert search(client, headers, "bank") == ["mybank.example"]
+    assert search(client, other, "bank") == ["otherbank.example"]
+    assert search(client, other, "alice") == []
+
+
+def test_search_finds_typos_and_follows_changes(client, user):
+    _, headers = user
+    entry_id = create(client, headers, "bank.example", notes="savings account")
+    create(client, headers, "shop.example")
+
+    assert search(client, headers, "bnak") == ["bank.example"]
+    assert set(search(client, headers, "bnak shpo")) == {"bank.example", "shop.example"}
+    assert search(client, headers, "savings") == ["bank.example"]
+    # Короткие запросы ищутся по префиксу без индекса
+    assert search(client, headers, "sh") == ["shop.example"]
+
+    client.put(f"/passwords/{entry_id}/", json={"website": "credit.example"}, headers=headers)
+    assert search(client, headers, "credit") == ["credit.example"]
+    assert "credit.example" not in search(client, headers, "bank")
+
+    client.delete(f"/passwords/{entry_id}/", headers=headers)
+    assert search(client, headers, "credit") == []
+
+
+def test_foreign_delete_keeps_the_owner_index(client, user):
+    _, headers = user
+    entry_id = create(client, headers, "kept.example")
+    client.delete(f"/passwords/{entry_id}/", headers=register(client))
+    client.post("/passwords/batch/", json={"update": [{"id_entry": entry_id, "website": "x"}]},
+                headers=register(client))
+    assert search(client, headers, "kept") == ["kept.example"]
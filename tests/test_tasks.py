@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from sqlalchemy import update
+
+from backend import tasks
+from backend.db import new_session
+from backend.models import PasswordEntry
+from backend.repositories import JobLeaseRepository
+
+
+async def _forget_fingerprints(id_user: int):
+    async with new_session() as session:
+        await session.execute(
+            update(PasswordEntry)
+            .where(PasswordEntry.id_user == id_user)
+            .values(password_fingerprint=None)
+        )
+        await session.commit()
+
+
+async def _hold_lease(owner: str, held: bool):
+    async with new_session() as session:
+        if held:
+            assert await JobLeaseRepository.acquire(
+                session, "backfill_fingerprints", owner, timedelta(minutes=5)
+            )
+        else:
+            await JobLeaseRepository.release(session, "backfill_fingerprints", owner)
+
+
+def test_backfill_runs_in_one_process_at_a_time(client, user):
+    id_user, headers = user
+    client.post("/passwords/", json={"website": "a", "password": "pw"}, headers=headers)
+    client.portal.call(_forget_fingerprints, id_user)
+
+    # Пока проход ведет другой воркер, остальные выходят сразу
+    client.portal.call(_hold_lease, "other-worker", True)
+    assert client.portal.call(tasks.backfill_fingerprints) == 0
+
+    client.portal.call(_hold_lease, "other-worker", False)
+    assert client.portal.call(tasks.backfill_fingerprints) == 1
+    # Аренда освобождена, повторный запуск ничего не находит
+    assert client.portal.call(tasks.backfill_fingerprints) == 0
+
+
+def test_backfill_skips_undecryptable_entries(client, user, make_undecryptable, caplog):
+    id_user, headers = user
+    orphan, *others = [
+        client.post(
+            "/passwords/", json={"website": site, "password": "pw"}, headers=headers
+        ).json()["id_entry"]
+        for site in ("a", "b", "c")
+    ]
+    make_undecryptable(orphan)
+    client.portal.call(_forget_fingerprints, id_user)
+
+    assert client.portal.call(tasks.backfill_fingerprints, 1) == len(others)
+    assert f"[{orphan}]" in caplog.text
+    # Остальные записи получили отпечатки: повторное использование снова видно
+    reused = client.get("/passwords/health/reused/", headers=headers).json()
+    assert sorted(entry["id_entry"] for group in reused["groups"] for entry in group["entries"]) == others
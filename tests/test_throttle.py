@@ -0,0 +1,81 @@
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from backend import throttle as throttle_module
+from backend.throttle import LoginThrottle, MemoryThrottleStore
+
+
+@pytest.fixture
+def login_throttle(monkeypatch):
+    # Свежий ограничитель: все тесты ходят с одного адреса "testclient"
+    throttle = LoginThrottle(MemoryThrottleStore(), email_limit=5, ip_limit=20)
+    monkeypatch.setattr("backend.api.user.login_throttle", throttle)
+    return throttle
+
+
+def register(client, password: str = "secret") -> str:
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register/", json={"email": email, "password": password})
+    return email
+
+
+def login(client, email: str, password: str) -> int:
+    return client.post("/auth/login/", json={"email": email, "password": password}).status_code
+
+
+def test_concurrent_burst_is_limited(client, login_throttle):
+    email = register(client)
+    with ThreadPoolExecutor(10) as pool:
+        codes = list(pool.map(lambda _: login(client, email, "wrong"), range(30)))
+    assert sorted(codes) == [400] * 5 + [429] * 25
+    assert login_throttle.stats() == {"rejected": 25, "lockouts": 1}
+
+
+def test_unverified_attempts_are_not_counted(client, login_throttle, monkeypatch):
+    email = register(client)
+
+    async def busy(*args):
+        raise HTTPException(status_code=503, detail="Server is busy, try again later")
+
+    monkeypatch.setattr("backend.api.user.hash_pool.verify", busy)
+    assert [login(client, email, "secret") for _ in range(10)] == [503] * 10
+    monkeypatch.undo()
+    monkeypatch.setattr("backend.api.user.login_throttle", login_throttle)
+
+    assert [login(client, email, "wrong") for _ in range(5)] == [400] * 5
+    assert login(client, email, "secret") == 429
+
+
+def test_unknown_email_counts_only_for_ip(client, monkeypatch):
+    throttle = LoginThrottle(MemoryThrottleStore(), email_limit=2, ip_limit=6)
+    monkeypatch.setattr("backend.api.user.login_throttle", throttle)
+    assert [login(client, "nobody@example.com", "x") for _ in range(7)] == [400] * 6 + [429]
+
+
+def test_backoff_doubles_and_resets(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(throttle_module.time, "time", lambda: now[0])
+    throttle = LoginThrottle(
+        MemoryThrottleStore(), window=60, email_limit=2, ip_limit=0, backoff=10, max_backoff=15
+    )
+
+    def attempt() -> str | None:
+        try:
+            asyncio.run(throttle.check("a@example.com", "1.2.3.4"))
+        except HTTPException as exc:
+            return exc.headers["Retry-After"]
+
+    assert [attempt(), attempt(), attempt()] == [None, None, "11"]
+    now[0] += 11
+    # Первая попытка после паузы проходит, но снова упирается в лимит
+    assert [attempt(), attempt()] == [None, "16"]
+    now[0] += 16
+    assert attempt() is None
+    assert attempt() == "16"
+
+    asyncio.run(throttle.record_success("a@example.com", "1.2.3.4"))
+    assert [attempt(), attempt(), attempt()] == [None, None, "11"]
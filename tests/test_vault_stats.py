@@ -0,0 +1,156 @@
+from sqlalchemy import update
+
+from backend.db import new_session
+from backend.models import PasswordEntry
+from backend.repositories import PasswordRepository, VaultStatsRepository
+
+STRONG = "Str0ng-Passw0rd!"
+
+
+async def _stats(id_user: int, rebuild: bool = False):
+    async with new_session() as session:
+        if rebuild:
+            await VaultStatsRepository.rebuild(session, [id_user])
+        stats, buckets = await VaultStatsRepository.get(session, id_user)
+        result = (
+            None if stats is None
+            else {key: getattr(stats, key) for key in ("entries", "weak", "reused", "breached")},
+            sorted(tuple(row) for row in buckets),
+        )
+        # Пересчет только для сравнения: инкрементальные агрегаты не трогаем
+        await session.rollback()
+        return result
+
+
+def assert_matches_rebuild(client, id_user: int) -> dict:
+    incremental = client.portal.call(_stats, id_user)
+    assert incremental == client.portal.call(_stats, id_user, True)
+    return incremental[0]
+
+
+def create(client, headers, website: str, password: str) -> int:
+    response = client.post(
+        "/passwords/", json={"website": website, "password": password}, headers=headers
+    )
+    return response.json()["id_entry"]
+
+
+def test_registration_creates_empty_stats(client, user):
+    id_user, headers = user
+    assert client.portal.call(_stats, id_user)[0] == {
+        "entries": 0, "weak": 0, "reused": 0, "breached": 0
+    }
+    assert client.get("/passwords/stats/", headers=headers).json()["entries"] == 0
+
+
+def test_single_entry_changes(client, user):
+    id_user, headers = user
+    ids = [create(client, headers, site, password) for site, password in
+           [("a", "same"), ("b", "same"), ("c", STRONG), ("d", "same")]]
+    assert assert_matches_rebuild(client, id_user) == {
+        "entries": 4, "weak": 3, "reused": 3, "breached": 0
+    }
+
+    client.put(f"/passwords/{ids[0]}/", json={"password": STRONG}, headers=headers)
+    assert assert_matches_rebuild(client, id_user)["reused"] == 4
+
+    client.put(f"/passwords/{ids[1]}/", json={"notes": "only notes"}, headers=headers)
+    assert_matches_rebuild(client, id_user)
+
+    client.delete(f"/passwords/{ids[3]}/", headers=headers)
+    assert assert_matches_rebuild(client, id_user) == {
+        "entries": 3, "weak": 1, "reused": 2, "breached": 0
+    }
+
+
+def test_import_and_batch(client, user):
+    id_user, headers = user
+    client.post(
+        "/passwords/import/",
+        content="".join(
+            f'{{"website": "site{i}", "password": "{"dup" if i % 3 else STRONG + str(i)}"}}\n'
+            for i in range(12)
+        ),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert_matches_rebuild(client, id_user)
+
+    ids = [item["id_entry"] for item in client.get("/passwords/", headers=headers).json()["items"]]
+    client.post(
+        "/passwords/batch/",
+        json={
+            "update": [
+                {"id_entry": ids[0], "password": "dup"},
+                {"id_entry": ids[1], "password": STRONG},
+                {"id_entry": ids[2], "website": "renamed"},
+            ],
+            "delete": ids[3:6],
+        },
+        headers=headers,
+    )
+    assert assert_matches_rebuild(client, id_user)["entries"] == 9
+
+
+def test_concurrent_delete_is_counted_once(client, user, monkeypatch):
+    id_user, headers = user
+    first = create(client, headers, "a", "weak")
+    second = create(client, headers, "b", "weak")
+    bump = PasswordRepository._bump_vault_version
+    raced = []
+
+    async def bump_after_concurrent_delete(session, id_user):
+        # Параллельный запрос удаляет те же записи между началом и записью
+        if not raced:
+            raced.append(True)
+            async with new_session() as other:
+                await PasswordRepository.delete_password_entry(other, first, id_user)
+        return await bump(session, id_user)
+
+    async def delete_raced():
+        async with new_session() as session:
+            await PasswordRepository.delete_password_entry(session, first, id_user)
+
+    async def batch_raced():
+        async with new_session() as session:
+            await PasswordRepository.apply_batch(session, id_user, [], [], [first, second])
+
+    monkeypatch.setattr(PasswordRepository, "_bump_vault_version", bump_after_concurrent_delete)
+    client.portal.call(delete_raced)
+    assert assert_matches_rebuild(client, id_user)["entries"] == 1
+
+    raced.clear()
+    first = create(client, headers, "c", "weak")
+    client.portal.call(batch_raced)
+    assert assert_matches_rebuild(client, id_user)["entries"] == 0
+
+
+def test_backfill_updates_stats(client, user):
+    id_user, headers = user
+    for site, password in [("a", "same"), ("b", "same"), ("c", STRONG)]:
+        create(client, headers, site, password)
+
+    async def forget_checks():
+        # Записи, созданные до появления отпечатков и признака слабого пароля
+        async with new_session() as session:
+            await session.execute(
+                update(PasswordEntry)
+                .where(PasswordEntry.id_user == id_user)
+                .values(password_fingerprint=None, weak=None)
+            )
+            await VaultStatsRepository.rebuild(session, [id_user])
+            await session.commit()
+
+    async def backfill():
+        after_id = 0
+        async with new_session() as session:
+            while after_id is not None:
+                after_id, _, _ = await PasswordRepository.backfill_fingerprints(
+                    session, after_id, 2
+                )
+
+    client.portal.call(forget_checks)
+    assert client.portal.call(_stats, id_user)[0]["weak"] == 0
+    client.portal.call(backfill)
+    assert assert_matches_rebuild(client, id_user) == {
+        "entries": 3, "weak": 2, "reused": 2, "breached": 0
+    }